@@ -0,0 +1,52 @@
+from threading import Thread
+from time import thread_time
+from message import AckMode
+import protocol as net
+
+
+kMessagesToSend = 5000
+kWindowSize = 32
+kTimeout = 0.05
+kAckEvery = 4
+
+
+def run_with_sender_cpu(sender: net.SlidingWindowSender, receiver: net.SlidingWindowReceiver) -> float:
+    sender_cpu = [0.0]
+
+    def timed_sender_run() -> None:
+        start_cpu = thread_time()
+        sender.run()
+        sender_cpu[0] = thread_time() - start_cpu
+
+    sender_thread = Thread(target=timed_sender_run)
+    receiver_thread = Thread(target=receiver.run)
+
+    sender_thread.start()
+    receiver_thread.start()
+
+    sender_thread.join()
+    receiver_thread.join()
+
+    sender.close()
+    receiver.close()
+    return sender_cpu[0]
+
+
+def main(corruption_rate: float = 0.1, loss_rate: float = 0.02):
+    print('protocol\tack_mode\tdata_messages\tack_messages\ttotal_messages\tsender_cpu_us_per_packet')
+    for protocol_type in [net.Protocol.kGbn, net.Protocol.kSrp]:
+        for ack_mode in [AckMode.kPerPacket, AckMode.kCumulative, AckMode.kSelective]:
+            sender, receiver = net.SlidingWindowProtocol.create_connected(
+                protocol_type, kWindowSize, kTimeout, corruption_rate, seed=0, loss_rate=loss_rate,
+                ack_mode=ack_mode, ack_every=kAckEvery)
+            sender.set_max_messages_num(kMessagesToSend)
+
+            sender_cpu = run_with_sender_cpu(sender, receiver)
+            data_messages = sender.get_sended_messages_num()
+            ack_messages = receiver.transport.sended_frames
+            print(f'{net.Protocol.to_short_str(protocol_type)}\t{AckMode.to_str(ack_mode)}\t{data_messages}\t{ack_messages}\t'
+                  f'{data_messages + ack_messages}\t{sender_cpu / kMessagesToSend * 1e6:.2f}')
+
+
+if __name__ == '__main__':
+    main()
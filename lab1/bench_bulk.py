@@ -0,0 +1,63 @@
+from concurrent.futures import ProcessPoolExecutor
+from resource import getrusage, RUSAGE_SELF
+from tempfile import TemporaryDirectory
+from typing import Tuple
+from transport import TransportType
+from sweep import measure_protocol
+import protocol as net
+import mmap
+import os
+
+
+kFileSize = 1 << 30
+# largest multiple of 4 KB that still fits a udp datagram together with the message header
+kMss = 60 * 1024
+kWindowSize = 64
+kTimeout = 0.05
+kChunkSize = 1 << 24
+
+
+def make_file(path: str, size: int) -> None:
+    with open(path, 'wb') as file:
+        for offset in range(0, size, kChunkSize):
+            file.write(os.urandom(min(kChunkSize, size - offset)))
+
+
+def transfer(path: str, protocol_type: net.Protocol, transport_type: TransportType, loss_rate: float) -> Tuple[float, int, bool]:
+    # the mapping stays open until the worker exits, in flight messages still hold slices of it
+    with open(path, 'rb') as file:
+        data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    sender, receiver = net.SlidingWindowProtocol.create_connected(
+        protocol_type, kWindowSize, kTimeout, 0.0, seed=0, transport_type=transport_type, loss_rate=loss_rate)
+    sender.set_payload(data, kMss)
+    receiver.set_stream_buffer(len(data))
+
+    work_time = measure_protocol(sender, receiver)
+    # compare chunk by chunk, a single bytes() of the mapping would double the footprint
+    valid = all(data[offset:offset + kChunkSize] == receiver.stream[offset:offset + kChunkSize]
+                for offset in range(0, len(data), kChunkSize))
+
+    # ru_maxrss is in kilobytes on linux
+    return len(data) / work_time / 1e6, getrusage(RUSAGE_SELF).ru_maxrss // 1024, valid
+
+
+def main(file_size: int = kFileSize, loss_rate: float = 0.0):
+    with TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'bulk.bin')
+        make_file(path, file_size)
+
+        print(f'file_mb\t{file_size / 1e6:.0f}')
+        print('protocol\ttransport\tgoodput_mb_s\tmax_rss_mb\tvalid')
+        for protocol_type in [net.Protocol.kGbn, net.Protocol.kSrp]:
+            for transport_type in [TransportType.kInProcess, TransportType.kUdp]:
+                # a fresh process per transfer so that max rss belongs to this transfer only
+                with ProcessPoolExecutor(max_workers=1) as executor:
+                    mb_s, max_rss, valid = executor.submit(transfer, path, protocol_type, transport_type, loss_rate).result()
+
+                print(f'{net.Protocol.to_short_str(protocol_type)}\t{TransportType.to_str(transport_type)}\t'
+                      f'{mb_s:.2f}\t{max_rss}\t{valid}')
+
+
+if __name__ == '__main__':
+    main()
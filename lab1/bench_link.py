@@ -0,0 +1,61 @@
+from typing import Dict, List
+from link import LinkProfile
+from transport import TransportType
+from sweep import measure_protocol
+import protocol as net
+
+
+kProfiles: Dict[str, LinkProfile] = {
+    'lan': LinkProfile(delay=0.0005, rate=125e6, queue_depth=1000),
+    'wan': LinkProfile(delay=0.02, jitter=0.002, rate=12.5e6, queue_depth=256, loss_rate=0.001),
+    'lossy-wan': LinkProfile(delay=0.02, jitter=0.002, rate=12.5e6, queue_depth=256, loss_rate=0.01, burst_length=4.0),
+    'satellite': LinkProfile(delay=0.3, jitter=0.01, rate=2.5e6, queue_depth=512, loss_rate=0.005, burst_length=2.0),
+}
+kWindowSizes = [1, 4, 16, 64, 256]
+kMss = 1400
+kMessagesToSend = 2000
+kInitialTimeout = 1.0
+# a fixed timeout shorter than the wan round trip, every ack arrives after the sender moved back
+kShortTimeout = 0.03
+kShortTimeoutLimit = 60.0
+
+
+def goodput(protocol_type: net.Protocol, profile: LinkProfile, window_size: int) -> float:
+    sender, receiver = net.SlidingWindowProtocol.create_connected(
+        protocol_type, window_size, kInitialTimeout, 0.0, engine=net.Engine.kEvent, seed=0, adaptive_timeout=True,
+        transport_type=TransportType.kEmulatedLink, link_profile=profile)
+    sender.set_payload(bytes(kMss * kMessagesToSend), kMss)
+
+    work_time = measure_protocol(sender, receiver)
+    return kMss * kMessagesToSend / work_time / 1e6
+
+
+# go back n used to drop every late ack and never finished, the run is bounded instead of waited for
+def check_short_timeout() -> None:
+    sender, receiver = net.SlidingWindowProtocol.create_connected(
+        net.Protocol.kGbn, 16, kShortTimeout, 0.0, engine=net.Engine.kEvent, seed=0,
+        transport_type=TransportType.kEmulatedLink, link_profile=kProfiles['wan'])
+
+    sender.run()
+    receiver.run()
+    sender.scheduler.run(kShortTimeoutLimit)
+    assert sender.is_finished() and receiver.delivered_num == sender.max_messages_num
+
+
+def main(profiles: Dict[str, LinkProfile] = kProfiles, window_sizes: List[int] = kWindowSizes):
+    check_short_timeout()
+
+    print('profile\tbdp_packets\tprotocol\twindow\tgoodput_mb_s\tlink_mb_s')
+    for name, profile in profiles.items():
+        # packets in flight needed to fill the pipe
+        bdp_packets = 2.0 * profile.delay * profile.rate / kMss
+
+        for protocol_type in [net.Protocol.kGbn, net.Protocol.kSrp]:
+            for window_size in window_sizes:
+                mb_s = goodput(protocol_type, profile, window_size)
+                print(f'{name}\t{bdp_packets:.0f}\t{net.Protocol.to_short_str(protocol_type)}\t{window_size}\t'
+                      f'{mb_s:.3f}\t{profile.rate / 1e6:.1f}')
+
+
+if __name__ == '__main__':
+    main()
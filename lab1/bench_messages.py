@@ -0,0 +1,88 @@
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from time import perf_counter
+from typing import Tuple
+from message import Message, MsgCode
+from scheduler import EventScheduler
+import protocol as net
+import tracemalloc
+import gc
+
+
+kMessagesNum = 1000000
+kWindowSize = 256
+kTimeout = 0.05
+
+
+# the layout Message and MessageNode had before __slots__, kept as the reference point
+class DictMessage:
+    def __init__(self, id: int, code: MsgCode, data, sack: int = 0, seq: int = 0) -> None:
+        self.id = id
+        self.code = code
+        self.data = data
+        self.sack = sack
+        self.seq = seq
+
+
+class DictMessageNode:
+    def __init__(self, send_time: float, message: DictMessage) -> None:
+        self.send_time = send_time
+        self.deadline = 0.0
+        self.sends_num = 0
+        self.message = message
+
+
+def live_bytes_per_message(message_type, node_type, messages_num: int) -> float:
+    gc.collect()
+    tracemalloc.start()
+    # send time and id are distinct floats/ints like in a real window, data is the shared dummy string
+    nodes = [node_type(float(i), message_type(i, MsgCode.kSuccess, 'data', seq=i)) for i in range(messages_num)]
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    del nodes
+    return size / messages_num
+
+
+# peak rss of this address space, unlike ru_maxrss it is not inherited from the parent across fork and exec
+def peak_rss_mb() -> int:
+    with open('/proc/self/status') as status:
+        for line in status:
+            if line.startswith('VmHWM:'):
+                return int(line.split()[1]) // 1024
+
+    return 0
+
+
+def churn(messages_num: int, corruption_rate: float) -> Tuple[float, int, int]:
+    scheduler = EventScheduler()
+    sender, receiver = net.SlidingWindowProtocol.create_connected(
+        net.Protocol.kSrp, kWindowSize, kTimeout, corruption_rate, engine=net.Engine.kEvent, scheduler=scheduler, seed=0)
+    sender.set_max_messages_num(messages_num)
+
+    collections = sum(stat['collections'] for stat in gc.get_stats())
+    start_time = perf_counter()
+    sender.run()
+    scheduler.run()
+    work_time = perf_counter() - start_time
+    collections = sum(stat['collections'] for stat in gc.get_stats()) - collections
+
+    return work_time, collections, peak_rss_mb()
+
+
+def main(messages_num: int = kMessagesNum, corruption_rate: float = 0.1):
+    print(f'messages\t{messages_num}')
+    print('layout\tlive_bytes_per_message')
+    print(f'dict\t{live_bytes_per_message(DictMessage, DictMessageNode, messages_num):.1f}')
+    print(f'slots\t{live_bytes_per_message(Message, net.SelectiveRepeatSender.MessageNode, messages_num):.1f}')
+
+    # a spawned process so that max rss belongs to the transfer only and not to the live set built above
+    with ProcessPoolExecutor(max_workers=1, mp_context=get_context('spawn')) as executor:
+        work_time, collections, max_rss = executor.submit(churn, messages_num, corruption_rate).result()
+
+    print('work_s\tus_per_message\tgc_collections\tmax_rss_mb')
+    print(f'{work_time:.2f}\t{work_time / messages_num * 1e6:.2f}\t{collections}\t{max_rss}')
+
+
+if __name__ == '__main__':
+    main()
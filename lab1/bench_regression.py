@@ -0,0 +1,150 @@
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from time import perf_counter, process_time
+from typing import Dict, List, NamedTuple
+from bench_messages import peak_rss_mb
+from cache import code_version
+from sweep import run_protocol
+import protocol as net
+import argparse
+import platform
+import json
+import sys
+
+
+class BenchCase(NamedTuple):
+    protocol: net.Protocol
+    engine: net.Engine
+    window_size: int
+    corruption_rate: float
+    messages_num: int
+
+    def name(self) -> str:
+        return (f'{net.Protocol.to_short_str(self.protocol)}/{net.Engine.to_str(self.engine)}/'
+                f'w{self.window_size}/c{self.corruption_rate}/n{self.messages_num}')
+
+
+class BenchResult(NamedTuple):
+    messages_per_second: float
+    cpu_us_per_packet: float
+    peak_rss_mb: int
+
+
+kEngines = [net.Engine.kThreaded, net.Engine.kEvent, net.Engine.kAsyncio]
+kWindowSizes = [8, 64]
+kCorruptionRates = [0.0, 0.1]
+# the threaded and asyncio engines run in wall time, 10^6 messages there take too long for a routine run
+kMessageCounts: Dict[net.Engine, List[int]] = {
+    net.Engine.kThreaded: [10 ** 4, 10 ** 5],
+    net.Engine.kEvent: [10 ** 4, 10 ** 6],
+    net.Engine.kAsyncio: [10 ** 4, 10 ** 5],
+}
+kTimeout = 0.05
+kRepetitions = 3
+kThreshold = 0.1
+
+
+def make_cases(quick: bool) -> List[BenchCase]:
+    return [
+        BenchCase(protocol_type, engine, window_size, corruption_rate, max(100, messages_num // 100) if quick else messages_num)
+        for protocol_type in [net.Protocol.kGbn, net.Protocol.kSrp]
+        for engine in kEngines
+        for window_size in kWindowSizes
+        for corruption_rate in kCorruptionRates
+        for messages_num in kMessageCounts[engine]
+    ]
+
+
+def run_case(case: BenchCase, repetitions: int) -> BenchResult:
+    best_time = None
+    best_cpu = None
+    for _ in range(repetitions):
+        sender, receiver = net.SlidingWindowProtocol.create_connected(
+            case.protocol, case.window_size, kTimeout, case.corruption_rate, case.engine, seed=0)
+        sender.set_max_messages_num(case.messages_num)
+
+        start_cpu = process_time()
+        start_time = perf_counter()
+        run_protocol(sender, receiver)
+        work_time = perf_counter() - start_time
+        cpu = process_time() - start_cpu
+
+        best_time = work_time if best_time is None else min(best_time, work_time)
+        best_cpu = cpu if best_cpu is None else min(best_cpu, cpu)
+
+    return BenchResult(case.messages_num / best_time, best_cpu / case.messages_num * 1e6, peak_rss_mb())
+
+
+def run_cases(cases: List[BenchCase], repetitions: int) -> Dict[str, BenchResult]:
+    results = {}
+    for case in cases:
+        # a spawned process per case keeps peak rss and interpreter state apart
+        with ProcessPoolExecutor(max_workers=1, mp_context=get_context('spawn')) as executor:
+            results[case.name()] = executor.submit(run_case, case, repetitions if case.messages_num < 10 ** 6 else 1).result()
+
+        result = results[case.name()]
+        print(f'{case.name()}\t{result.messages_per_second:.0f}\t{result.cpu_us_per_packet:.2f}\t{result.peak_rss_mb}', flush=True)
+
+    return results
+
+
+def save_baseline(path: str, results: Dict[str, BenchResult]) -> None:
+    baseline = {
+        'code_version': code_version(),
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'cases': {name: result._asdict() for name, result in results.items()},
+    }
+    with open(path, 'w') as file:
+        json.dump(baseline, file, indent=2)
+
+
+# a case regresses when it is slower, uses more cpu per packet or more memory than the baseline by more than threshold
+def compare_baseline(path: str, results: Dict[str, BenchResult], threshold: float) -> List[str]:
+    with open(path) as file:
+        baseline = json.load(file)
+
+    regressions = []
+    print('case\tmetric\tbaseline\tcurrent\tchange')
+    for name, result in results.items():
+        if name not in baseline['cases']:
+            continue
+
+        base = BenchResult(**baseline['cases'][name])
+        changes = [
+            ('messages_per_second', base.messages_per_second / result.messages_per_second - 1.0),
+            ('cpu_us_per_packet', result.cpu_us_per_packet / base.cpu_us_per_packet - 1.0),
+            ('peak_rss_mb', result.peak_rss_mb / max(base.peak_rss_mb, 1) - 1.0),
+        ]
+        for metric, change in changes:
+            if change > threshold:
+                regressions.append(f'{name}\t{metric}')
+                print(f'{name}\t{metric}\t{getattr(base, metric)}\t{getattr(result, metric)}\t+{change * 100:.1f}%')
+
+    return regressions
+
+
+def main(args: List[str]) -> int:
+    parser = argparse.ArgumentParser(description='lab1 protocol throughput benchmark')
+    parser.add_argument('--save', help='write the results as a json baseline')
+    parser.add_argument('--compare', help='flag regressions against a json baseline')
+    parser.add_argument('--threshold', type=float, default=kThreshold)
+    parser.add_argument('--quick', action='store_true', help='message counts divided by 100')
+    options = parser.parse_args(args)
+
+    print('case\tmessages_per_second\tcpu_us_per_packet\tpeak_rss_mb')
+    results = run_cases(make_cases(options.quick), kRepetitions)
+
+    if options.save is not None:
+        save_baseline(options.save, results)
+
+    if options.compare is not None:
+        regressions = compare_baseline(options.compare, results, options.threshold)
+        print(f'{len(regressions)} regressions above {options.threshold * 100:.0f}%')
+        return 1 if len(regressions) > 0 else 0
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
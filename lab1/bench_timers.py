@@ -0,0 +1,58 @@
+from typing import List
+from time import perf_counter
+import protocol as net
+
+
+kWindowSizes = [5, 50, 500, 1000, 5000, 10000]
+kTicks = 2000
+
+
+def filled_sender(window_size: int) -> net.SelectiveRepeatSender:
+    # timeout far in the future, so no tick ever finds an expired packet
+    sender, _ = net.SlidingWindowProtocol.create_connected(net.Protocol.kSrp, window_size, 1e9, 0.0)
+    sender.set_max_messages_num(window_size)
+
+    while sender.send_next < window_size:
+        sender.send_new_message()
+
+    return sender
+
+
+def timer_heap_tick_cost(window_size: int) -> float:
+    sender = filled_sender(window_size)
+
+    start_time = perf_counter()
+    for _ in range(kTicks):
+        sender.resend_outdated_messages()
+        sender.next_timeout_time()
+
+    return (perf_counter() - start_time) / kTicks
+
+
+# the per-packet timeout test the sender walked its whole window with before the timer heap
+def is_outdated(sender: net.SelectiveRepeatSender, send_time: float) -> bool:
+    return net.get_current_time() - send_time > sender.timeout_time
+
+
+def linear_scan_tick_cost(window_size: int) -> float:
+    sender = filled_sender(window_size)
+    ticks = max(1, kTicks // max(1, window_size // 50))
+
+    start_time = perf_counter()
+    for _ in range(ticks):
+        for message_node in sender.message_nodes.values():
+            is_outdated(sender, message_node.send_time)
+
+    return (perf_counter() - start_time) / ticks
+
+
+def main(window_sizes: List[int] = kWindowSizes):
+    print('window_size\ttimer_heap_ns_per_tick\tlinear_scan_ns_per_tick')
+    for window_size in window_sizes:
+        heap_cost = timer_heap_tick_cost(window_size)
+        scan_cost = linear_scan_tick_cost(window_size)
+        print(f'{window_size}\t{heap_cost * 1e9:.0f}\t{scan_cost * 1e9:.0f}')
+
+
+if __name__ == '__main__':
+    main()
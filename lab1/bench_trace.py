@@ -0,0 +1,49 @@
+from time import perf_counter
+from typing import List
+from scheduler import EventScheduler
+from instrument import Tracer
+import protocol as net
+
+
+kMessagesToSend = 100000
+kWindowSize = 64
+kTimeout = 0.05
+kBinWidth = 0.1
+
+
+def run_traced(protocol_type: net.Protocol, tracer: Tracer, corruption_rate: float, loss_rate: float) -> float:
+    scheduler = EventScheduler()
+    sender, _ = net.SlidingWindowProtocol.create_connected(
+        protocol_type, kWindowSize, kTimeout, corruption_rate, engine=net.Engine.kEvent, scheduler=scheduler, seed=0,
+        loss_rate=loss_rate, tracer=tracer)
+    sender.set_max_messages_num(kMessagesToSend)
+
+    start_time = perf_counter()
+    sender.run()
+    scheduler.run()
+    return perf_counter() - start_time
+
+
+def main(trace_path: str = None, corruption_rate: float = 0.1, loss_rate: float = 0.02):
+    print('protocol\tuntraced_s\tcounters_s\tfull_trace_s')
+    tracers: List[Tracer] = []
+    for protocol_type in [net.Protocol.kGbn, net.Protocol.kSrp]:
+        untraced = run_traced(protocol_type, None, corruption_rate, loss_rate)
+        counters = run_traced(protocol_type, Tracer(keep_events=False), corruption_rate, loss_rate)
+        tracers.append(Tracer())
+        full_trace = run_traced(protocol_type, tracers[-1], corruption_rate, loss_rate)
+        print(f'{net.Protocol.to_short_str(protocol_type)}\t{untraced:.2f}\t{counters:.2f}\t{full_trace:.2f}')
+
+    for protocol_type, tracer in zip([net.Protocol.kGbn, net.Protocol.kSrp], tracers):
+        print(f'\n{net.Protocol.to_str(protocol_type)}')
+        tracer.print_summary()
+        _, goodput = tracer.goodput(kBinWidth)
+        print(f'goodput_min_max_msg_s\t{goodput.min():.0f}\t{goodput.max():.0f}')
+
+        if trace_path is not None:
+            tracer.write_binary(f'{trace_path}{net.Protocol.to_short_str(protocol_type)}.trace')
+            tracer.write_jsonl(f'{trace_path}{net.Protocol.to_short_str(protocol_type)}.jsonl')
+
+
+if __name__ == '__main__':
+    main()
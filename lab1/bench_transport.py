@@ -0,0 +1,33 @@
+from typing import List
+from transport import TransportType
+from sweep import measure_protocol
+import protocol as net
+
+
+kPayloadSizes = [64, 1024, 8192]
+kMessagesToSend = 5000
+kWindowSize = 32
+kTimeout = 0.05
+
+
+def goodput(protocol_type: net.Protocol, transport_type: TransportType, payload_size: int, loss_rate: float) -> float:
+    sender, receiver = net.SlidingWindowProtocol.create_connected(
+        protocol_type, kWindowSize, kTimeout, 0.0, seed=0, transport_type=transport_type, loss_rate=loss_rate)
+    sender.set_max_messages_num(kMessagesToSend)
+    sender.dummy_data = bytes(payload_size)
+
+    work_time = measure_protocol(sender, receiver)
+    return kMessagesToSend * payload_size / work_time / 1e6
+
+
+def main(payload_sizes: List[int] = kPayloadSizes, loss_rate: float = 0.0):
+    print('protocol\ttransport\tpayload_bytes\tgoodput_mb_s')
+    for protocol_type in [net.Protocol.kGbn, net.Protocol.kSrp]:
+        for transport_type in [TransportType.kInProcess, TransportType.kUdp]:
+            for payload_size in payload_sizes:
+                mb_s = goodput(protocol_type, transport_type, payload_size, loss_rate)
+                print(f'{net.Protocol.to_short_str(protocol_type)}\t{TransportType.to_str(transport_type)}\t{payload_size}\t{mb_s:.2f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+from __future__ import annotations
+from typing import Dict, List, Tuple
+import hashlib
+import sqlite3
+import os
+from message import AckMode
+import protocol as net
+import sweep as sw
+
+
+# everything a sweep point's outcome depends on
+kSimulationSources = [
+    'protocol.py', 'scheduler.py', 'channel.py', 'reorder.py', 'message.py', 'transport.py',
+    'rto.py', 'loss.py', 'link.py', 'instrument.py', 'sweep.py',
+]
+
+
+def code_version() -> str:
+    digest = hashlib.sha1()
+    directory = os.path.dirname(os.path.abspath(__file__))
+    for source in kSimulationSources:
+        with open(os.path.join(directory, source), 'rb') as file:
+            digest.update(file.read())
+
+    return digest.hexdigest()[:16]
+
+
+# Sweep results on disk, keyed by the sweep point and the version of the simulation code.
+# Points simulated by an older version are never returned, they are recomputed instead.
+class ResultCache:
+    kKeyColumns = ('protocol', 'window_size', 'timeout', 'corruption_rate', 'seed', 'messages_num', 'engine',
+                   'loss_rate', 'adaptive_timeout', 'link_profile', 'ack_mode', 'version')
+
+    def __init__(self, path: str, version: str = None) -> None:
+        self.path = path
+        self.version = version if version is not None else code_version()
+        self.connection = sqlite3.connect(path)
+        columns = tuple(row[1] for row in self.connection.execute('PRAGMA table_info(results)'))
+        if len(columns) > 0 and columns[:len(ResultCache.kKeyColumns)] != ResultCache.kKeyColumns:
+            # written before the sweep point got more fields, none of its results are current
+            self.connection.execute('DROP TABLE results')
+        self.connection.execute(
+            'CREATE TABLE IF NOT EXISTS results ('
+            'protocol TEXT, window_size INTEGER, timeout REAL, corruption_rate REAL, seed INTEGER, messages_num INTEGER, '
+            'engine TEXT, loss_rate REAL, adaptive_timeout INTEGER, link_profile TEXT, ack_mode TEXT, version TEXT, '
+            'sended_messages_num INTEGER, work_time REAL, '
+            f'PRIMARY KEY ({", ".join(ResultCache.kKeyColumns)}))')
+        self.connection.commit()
+
+        # results of the current version, read once, lookups stay in memory
+        rows = self.connection.execute(
+            f'SELECT {", ".join(ResultCache.kKeyColumns)}, sended_messages_num, work_time FROM results WHERE version = ?',
+            (self.version,))
+        self.cached: Dict[Tuple, Tuple[int, float]] = {tuple(row[:-2]): (row[-2], row[-1]) for row in rows}
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, point: sw.SweepPoint) -> Tuple:
+        link_profile = '' if point.link_profile is None else repr(tuple(point.link_profile))
+        return (net.Protocol.to_short_str(point.protocol), point.window_size, point.timeout, point.corruption_rate,
+                point.seed, point.messages_num, net.Engine.to_str(point.engine), point.loss_rate, int(point.adaptive_timeout),
+                link_profile, AckMode.to_str(point.ack_mode), self.version)
+
+    # cached results in the order of points, None where a point is missing
+    def get_many(self, points: List[sw.SweepPoint]) -> List[sw.SweepResult]:
+        results = []
+        for point in points:
+            values = self.cached.get(self.key(point))
+            results.append(None if values is None else sw.SweepResult(point, values[0], values[1]))
+
+        hits = sum(1 for r in results if r is not None)
+        self.hits += hits
+        self.misses += len(points) - hits
+        return results
+
+    def put_many(self, results: List[sw.SweepResult]) -> None:
+        self.connection.executemany(
+            f'INSERT OR REPLACE INTO results VALUES ({", ".join("?" * (len(ResultCache.kKeyColumns) + 2))})',
+            [self.key(r.point) + (r.sended_messages_num, r.work_time) for r in results])
+        self.connection.commit()
+
+        for r in results:
+            self.cached[self.key(r.point)] = (r.sended_messages_num, r.work_time)
+
+    def close(self) -> None:
+        self.connection.close()
@@ -0,0 +1,122 @@
+from __future__ import annotations
+from abc import ABC, abstractmethod
+from collections import deque
+from enum import Enum
+from threading import Condition
+from typing import Deque, List
+from time import time
+
+
+class ChannelType(Enum):
+    kUnbounded = 0,
+    kBounded = 1
+
+
+class Channel(ABC):
+    @staticmethod
+    def create(type: ChannelType, capacity: int = 0) -> Channel:
+        if type == ChannelType.kUnbounded:
+            return DequeChannel()
+        elif type == ChannelType.kBounded:
+            return BoundedChannel(capacity)
+
+        assert False
+
+    @abstractmethod
+    def put(self, message) -> bool:
+        pass
+
+    # deadline is an absolute time() value, None waits until a message arrives or the channel closes
+    @abstractmethod
+    def get(self, deadline: float = None):
+        pass
+
+    @abstractmethod
+    def wait(self, deadline: float = None) -> bool:
+        pass
+
+    @abstractmethod
+    def drain(self) -> List:
+        pass
+
+    @abstractmethod
+    def close(self) -> None:
+        pass
+
+    @abstractmethod
+    def __len__(self) -> int:
+        pass
+
+
+class DequeChannel(Channel):
+    def __init__(self) -> None:
+        self.messages: Deque = deque()
+        self.condition = Condition()
+        self.closed = False
+
+    def put(self, message) -> bool:
+        with self.condition:
+            self.messages.append(message)
+            self.condition.notify()
+
+        return True
+
+    def get(self, deadline: float = None):
+        with self.condition:
+            if not self.wait_locked(deadline):
+                return None
+
+            return self.messages.popleft()
+
+    def wait(self, deadline: float = None) -> bool:
+        with self.condition:
+            return self.wait_locked(deadline)
+
+    def drain(self) -> List:
+        with self.condition:
+            messages = list(self.messages)
+            self.messages.clear()
+
+        return messages
+
+    def close(self) -> None:
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+
+    def __len__(self) -> int:
+        return len(self.messages)
+
+    def wait_locked(self, deadline: float) -> bool:
+        while len(self.messages) == 0 and not self.closed:
+            if deadline is None:
+                self.condition.wait()
+                continue
+
+            time_left = deadline - time()
+            if time_left <= 0.0:
+                break
+
+            self.condition.wait(time_left)
+
+        return len(self.messages) > 0
+
+
+class BoundedChannel(DequeChannel):
+    def __init__(self, capacity: int) -> None:
+        super().__init__()
+        assert capacity > 0
+        self.capacity = capacity
+        self.dropped = 0
+
+    def put(self, message) -> bool:
+        with self.condition:
+            if len(self.messages) >= self.capacity:
+                # tail drop, the protocols recover through their timeouts
+                self.dropped += 1
+                return False
+
+            self.messages.append(message)
+            self.condition.notify()
+
+        return True
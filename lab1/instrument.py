@@ -0,0 +1,156 @@
+from __future__ import annotations
+from array import array
+from enum import Enum
+from threading import Lock
+from typing import Dict, Tuple
+import numpy as np
+import struct
+import json
+
+
+class TraceEvent(Enum):
+    kSend = 0
+    kRetransmit = 1
+    kAck = 2
+    kNack = 3
+    kTimeout = 4
+    kWindowAdvance = 5
+    kDiscard = 6
+    kDeliver = 7
+
+    @staticmethod
+    def to_str(event: TraceEvent) -> str:
+        if event == TraceEvent.kSend:
+            return 'send'
+        elif event == TraceEvent.kRetransmit:
+            return 'retransmit'
+        elif event == TraceEvent.kAck:
+            return 'ack'
+        elif event == TraceEvent.kNack:
+            return 'nack'
+        elif event == TraceEvent.kTimeout:
+            return 'timeout'
+        elif event == TraceEvent.kWindowAdvance:
+            return 'window-advance'
+        elif event == TraceEvent.kDiscard:
+            return 'discard'
+        elif event == TraceEvent.kDeliver:
+            return 'deliver'
+
+        return ''
+
+
+# Collects the events of one sender/receiver pair. Counters, delivery latencies and window occupancy are
+# always kept, the full event log only with keep_events. Endpoints without a tracer skip all of it.
+class Tracer:
+    # time, event, message id, sequence number, window occupancy
+    kRecord = struct.Struct('<dBqqI')
+    kMagic = b'SWTR'
+
+    def __init__(self, keep_events: bool = True) -> None:
+        self.keep_events = keep_events
+        self.times = array('d')
+        self.events = array('B')
+        self.message_ids = array('q')
+        self.seqs = array('q')
+        self.windows = array('I')
+
+        self.counts = [0] * len(TraceEvent)
+        # the sender reports every transmission as kSend, sequence numbers seen before become kRetransmit
+        self.highest_sent_seq = -1
+        self.first_send_times: Dict[int, float] = {}
+        self.latencies = array('d')
+        self.delivery_times = array('d')
+        self.window_times = array('d')
+        self.window_values = array('I')
+        # both threaded endpoints record into one tracer, a row must not interleave with the other thread's
+        self.lock = Lock()
+
+    def record(self, time: float, event: TraceEvent, message_id: int, seq: int, window: int) -> None:
+        with self.lock:
+            if event == TraceEvent.kSend:
+                if seq <= self.highest_sent_seq:
+                    event = TraceEvent.kRetransmit
+                else:
+                    self.highest_sent_seq = seq
+                    self.first_send_times[seq] = time
+            elif event == TraceEvent.kDeliver:
+                send_time = self.first_send_times.pop(seq, None)
+                if send_time is not None:
+                    self.latencies.append(time - send_time)
+                self.delivery_times.append(time)
+
+            if event == TraceEvent.kSend or event == TraceEvent.kRetransmit or event == TraceEvent.kWindowAdvance:
+                self.window_times.append(time)
+                self.window_values.append(window)
+
+            self.counts[event.value] += 1
+
+            if self.keep_events:
+                self.times.append(time)
+                self.events.append(event.value)
+                self.message_ids.append(message_id)
+                self.seqs.append(seq)
+                self.windows.append(window)
+
+    def get_count(self, event: TraceEvent) -> int:
+        return self.counts[event.value]
+
+    def latency_histogram(self, bins: int = 50) -> Tuple[np.ndarray, np.ndarray]:
+        return np.histogram(np.frombuffer(self.latencies, dtype=np.float64), bins)
+
+    # delivered payload per second in consecutive bins of bin_width seconds, in messages unless
+    # payload_size is given
+    def goodput(self, bin_width: float, payload_size: int = 1) -> Tuple[np.ndarray, np.ndarray]:
+        delivery_times = np.frombuffer(self.delivery_times, dtype=np.float64)
+        if len(delivery_times) == 0:
+            return np.zeros(0), np.zeros(0)
+
+        start_time = delivery_times[0]
+        bins_num = int((delivery_times[-1] - start_time) / bin_width) + 1
+        counts, edges = np.histogram(delivery_times, bins_num, (start_time, start_time + bins_num * bin_width))
+        return edges[:-1], counts * payload_size / bin_width
+
+    def window_occupancy(self) -> Tuple[np.ndarray, np.ndarray]:
+        return np.frombuffer(self.window_times, dtype=np.float64), np.frombuffer(self.window_values, dtype=np.uint32)
+
+    def print_summary(self) -> None:
+        for event in TraceEvent:
+            print(f'{TraceEvent.to_str(event)}\t{self.get_count(event)}')
+
+        if len(self.latencies) > 0:
+            latencies = np.frombuffer(self.latencies, dtype=np.float64)
+            p50, p90, p99 = np.percentile(latencies, [50, 90, 99])
+            print(f'latency_p50_ms\t{p50 * 1e3:.3f}\nlatency_p90_ms\t{p90 * 1e3:.3f}\nlatency_p99_ms\t{p99 * 1e3:.3f}')
+
+        if len(self.window_values) > 0:
+            print(f'mean_window_occupancy\t{np.mean(np.frombuffer(self.window_values, dtype=np.uint32)):.2f}')
+
+    def write_jsonl(self, path: str) -> None:
+        with open(path, 'w') as file:
+            for i in range(len(self.times)):
+                file.write(json.dumps({'time': self.times[i], 'event': TraceEvent.to_str(TraceEvent(self.events[i])),
+                                       'id': self.message_ids[i], 'seq': self.seqs[i], 'window': self.windows[i]}) + '\n')
+
+    def write_binary(self, path: str) -> None:
+        with open(path, 'wb') as file:
+            file.write(Tracer.kMagic)
+            file.write(struct.pack('<q', len(self.times)))
+            for i in range(len(self.times)):
+                file.write(Tracer.kRecord.pack(self.times[i], self.events[i], self.message_ids[i], self.seqs[i], self.windows[i]))
+
+    # replays a binary trace, so the derived statistics are available again
+    @staticmethod
+    def read_binary(path: str) -> Tracer:
+        with open(path, 'rb') as file:
+            data = file.read()
+
+        assert data[:len(Tracer.kMagic)] == Tracer.kMagic
+        records_num, = struct.unpack_from('<q', data, len(Tracer.kMagic))
+
+        tracer = Tracer()
+        offset = len(Tracer.kMagic) + 8
+        for time, event, message_id, seq, window in Tracer.kRecord.iter_unpack(data[offset:offset + records_num * Tracer.kRecord.size]):
+            tracer.record(time, TraceEvent(event), message_id, seq, window)
+
+        return tracer
@@ -0,0 +1,98 @@
+from __future__ import annotations
+from collections import deque
+from typing import Deque, List, NamedTuple
+from numpy import random as rnd
+from loss import LossModel, BernoulliLoss, GilbertElliottLoss
+from transport import Transport
+from message import Message
+
+
+class LinkProfile(NamedTuple):
+    # one-way propagation delay and the upper bound of the uniform extra delay, seconds
+    delay: float = 0.0
+    jitter: float = 0.0
+    # serialization rate in bytes per second, 0 is an infinitely fast link
+    rate: float = 0.0
+    # frames waiting for serialization before tail drop, 0 is an unbounded queue
+    queue_depth: int = 0
+    loss_rate: float = 0.0
+    # mean length of a loss burst in packets, 1 gives independent losses
+    burst_length: float = 1.0
+
+    def create_loss_model(self, seed: int = None) -> LossModel:
+        if self.burst_length <= 1.0:
+            return BernoulliLoss(self.loss_rate, seed)
+
+        return GilbertElliottLoss.from_burst(self.loss_rate, self.burst_length, seed)
+
+
+# One direction of a point-to-point link on top of a scheduler: a drop tail queue in front of the
+# serializer, loss on the wire and propagation delay with jitter. The scheduler's own link_delay is
+# added on delivery to the event endpoints, create_connected builds a scheduler without it.
+class EmulatedLinkTransport(Transport):
+    kJitterBatchSize = 4096
+
+    def __init__(self, scheduler, peer, profile: LinkProfile, seed: int = None) -> None:
+        super().__init__(loss_model=profile.create_loss_model(seed))
+        self.scheduler = scheduler
+        self.peer = peer
+        self.profile = profile
+        self.jitter_rnd = rnd.default_rng(None if seed is None else seed + 1000003)
+        self.jitters: List[float] = []
+        self.jitter_position = 0
+        # departure times of the frames still queued or being serialized
+        self.departures: Deque[float] = deque()
+        self.link_free_time = 0.0
+        self.last_arrival = 0.0
+        self.dropped_frames = 0
+        self.transmitted_bytes = 0
+
+    def send(self, message: Message) -> None:
+        self.sended_frames += 1
+        current_time = self.scheduler.get_current_time()
+
+        while len(self.departures) > 0 and self.departures[0] <= current_time:
+            self.departures.popleft()
+
+        if self.profile.queue_depth > 0 and len(self.departures) >= self.profile.queue_depth:
+            # tail drop
+            self.dropped_frames += 1
+            self.lost_frames += 1
+            return
+
+        departure = current_time
+        if self.profile.rate > 0.0:
+            size = message.encoded_size()
+            departure = max(current_time, self.link_free_time) + size / self.profile.rate
+            self.link_free_time = departure
+            self.departures.append(departure)
+            self.transmitted_bytes += size
+
+        # a frame lost on the wire still took its serialization time
+        if self.loss_model.is_lost():
+            self.lost_frames += 1
+            return
+
+        self.propagate(message, departure)
+
+    # puts a frame on the wire right away, bypassing the queue and the loss model
+    def transmit(self, message: Message) -> None:
+        self.propagate(message, self.scheduler.get_current_time())
+
+    def propagate(self, message: Message, departure: float) -> None:
+        # jitter delays frames but a single link never reorders them
+        arrival = max(departure + self.profile.delay + self.next_jitter(), self.last_arrival)
+        self.last_arrival = arrival
+        self.scheduler.schedule(arrival - self.scheduler.get_current_time(), lambda: self.peer.get_message(message))
+
+    def next_jitter(self) -> float:
+        if self.profile.jitter <= 0.0:
+            return 0.0
+
+        if self.jitter_position == len(self.jitters):
+            self.jitters = self.jitter_rnd.uniform(0.0, self.profile.jitter, EmulatedLinkTransport.kJitterBatchSize).tolist()
+            self.jitter_position = 0
+
+        jitter = self.jitters[self.jitter_position]
+        self.jitter_position += 1
+        return jitter
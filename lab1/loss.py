@@ -0,0 +1,109 @@
+from __future__ import annotations
+from abc import ABC, abstractmethod
+from typing import List
+from numpy import random as rnd
+import numpy as np
+
+
+# Per-packet loss decisions, drawn kBatchSize at a time with numpy and handed out one by one.
+class LossModel(ABC):
+    kBatchSize = 4096
+
+    def __init__(self, seed: int = None) -> None:
+        self.rnd = rnd.default_rng(seed)
+        self.batch: List[bool] = []
+        self.position = 0
+
+    def is_lost(self) -> bool:
+        if self.position == len(self.batch):
+            self.batch = self.draw_batch(LossModel.kBatchSize).tolist()
+            self.position = 0
+
+        lost = self.batch[self.position]
+        self.position += 1
+        return lost
+
+    @abstractmethod
+    def draw_batch(self, size: int) -> np.ndarray:
+        pass
+
+    @abstractmethod
+    def get_loss_rate(self) -> float:
+        pass
+
+
+class BernoulliLoss(LossModel):
+    def __init__(self, loss_rate: float, seed: int = None) -> None:
+        super().__init__(seed)
+        self.loss_rate = max(min(loss_rate, 1.0), 0.0)
+
+    def is_lost(self) -> bool:
+        # a lossless link draws no random numbers at all
+        return self.loss_rate > 0.0 and super().is_lost()
+
+    def draw_batch(self, size: int) -> np.ndarray:
+        return self.rnd.uniform(0.0, 1.0, size) < self.loss_rate
+
+    def get_loss_rate(self) -> float:
+        return self.loss_rate
+
+
+# Two state Markov chain: the link moves good -> bad with p_good_bad and bad -> good with p_bad_good
+# per packet and loses packets with loss_good / loss_bad in the respective state.
+class GilbertElliottLoss(LossModel):
+    # mean loss rate with loss bursts of burst_length packets on average (the Gilbert special case)
+    @staticmethod
+    def from_burst(loss_rate: float, burst_length: float, seed: int = None) -> GilbertElliottLoss:
+        assert 0.0 <= loss_rate < 1.0 and burst_length >= 1.0
+        p_bad_good = 1.0 / burst_length
+        return GilbertElliottLoss(loss_rate * p_bad_good / (1.0 - loss_rate), p_bad_good, 0.0, 1.0, seed)
+
+    def __init__(
+            self,
+            p_good_bad: float,
+            p_bad_good: float,
+            loss_good: float = 0.0,
+            loss_bad: float = 1.0,
+            seed: int = None) -> None:
+        super().__init__(seed)
+        assert 0.0 <= p_good_bad <= 1.0 and 0.0 < p_bad_good <= 1.0
+        self.p_good_bad = p_good_bad
+        self.p_bad_good = p_bad_good
+        self.loss_good = loss_good
+        self.loss_bad = loss_bad
+        self.bad = False
+        # states generated past the end of the previous batch, the chain continues from them
+        self.pending_states = np.zeros(0, dtype=bool)
+
+    def draw_batch(self, size: int) -> np.ndarray:
+        states = [self.pending_states]
+        states_num = len(self.pending_states)
+
+        while states_num < size:
+            # whole sojourns at once: run lengths in one state are geometric
+            runs_num = max(1, int(size * (self.p_good_bad + self.p_bad_good)) + 1)
+            good_runs = self.rnd.geometric(self.p_good_bad, runs_num) if self.p_good_bad > 0.0 else np.full(runs_num, size)
+            bad_runs = self.rnd.geometric(self.p_bad_good, runs_num)
+
+            first_runs, second_runs = (bad_runs, good_runs) if self.bad else (good_runs, bad_runs)
+            lengths = np.empty(2 * runs_num, dtype=np.int64)
+            lengths[0::2] = first_runs
+            lengths[1::2] = second_runs
+
+            pattern = np.zeros(2 * runs_num, dtype=bool)
+            pattern[0::2] = self.bad
+            pattern[1::2] = not self.bad
+
+            states.append(np.repeat(pattern, lengths))
+            # an even number of sojourns, so the next chunk starts in self.bad again
+            states_num += int(lengths.sum())
+
+        states = np.concatenate(states)
+        self.pending_states = states[size:]
+
+        loss_probabilities = np.where(states[:size], self.loss_bad, self.loss_good)
+        return self.rnd.uniform(0.0, 1.0, size) < loss_probabilities
+
+    def get_loss_rate(self) -> float:
+        bad_share = self.p_good_bad / (self.p_good_bad + self.p_bad_good)
+        return bad_share * self.loss_bad + (1.0 - bad_share) * self.loss_good
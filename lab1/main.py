@@ -1,19 +1,24 @@
 from __future__ import annotations
-from threading import Thread
 from typing import List
 from matplotlib import pyplot as plt
 from enum import Enum
-from time import time
+from cache import ResultCache
+from message import AckMode
 import protocol as net
+import sweep as sw
 import numpy as np
+import sys
 import os
 
 
 kMessagesToSend = 100
+kEngine = net.Engine.kEvent
+kRepetitions = 1
 kThisFilePath = os.path.abspath(__file__)
+kCachePath = os.path.join(os.path.dirname(kThisFilePath), 'sweep_cache.sqlite')
 
 def img_save_dst() -> str:
-    return 'doc\\img\\'
+    return os.path.join(os.path.dirname(kThisFilePath), 'doc', 'img', '')
 
 
 class Statistics(Enum):
@@ -30,15 +35,21 @@ class Statistics(Enum):
         return ''
 
 
-def run_protocol(sender: net.SlidingWindowSender, receiver: net.SlidingWindowReceiver) -> None:
-    sender_thread = Thread(target=sender.run)
-    receiver_thread = Thread(target=receiver.run)
+def plot_summaries(xs: List[float], summaries: List[sw.SweepSummary], stat: Statistics, label: str) -> None:
+    if stat == Statistics.kMessageNum:
+        means = [s.sended_messages_mean for s in summaries]
+        stds = [s.sended_messages_std for s in summaries]
+    else:
+        means = [s.work_time_mean for s in summaries]
+        stds = [s.work_time_std for s in summaries]
 
-    sender_thread.start()
-    receiver_thread.start()
+    for x, s in zip(xs, summaries):
+        print(f'{label}, x = {x}, message_num = {s.sended_messages_mean}, work_time = {s.work_time_mean}')
 
-    sender_thread.join()
-    receiver_thread.join()
+    if kRepetitions > 1:
+        plt.errorbar(xs, means, yerr=stds, capsize=2, label=label)
+    else:
+        plt.plot(xs, means, label=label)
 
 
 def calculate_corruption_rate_dependencies(
@@ -47,23 +58,13 @@ def calculate_corruption_rate_dependencies(
         timeout: float,
         corruption_rates: List[float],
         stat: Statistics,
-        show_plot: bool = True) -> None:
-    messages_nums = []
-    work_times = []
+        show_plot: bool = True,
+        table: sw.SweepTable = None) -> None:
+    points = sw.make_points([protocol_type], [window_size], [timeout], corruption_rates, kRepetitions, kMessagesToSend, kEngine)
+    table = table if table is not None else sw.SweepRunner(1).run(points)
+    summaries = table.summaries_of(points)
 
-    for corruption_rate in corruption_rates:
-        sender, receiver = net.SlidingWindowProtocol.create_connected(protocol_type, window_size, timeout, corruption_rate)
-        sender.set_max_messages_num(kMessagesToSend)
-
-        start_time = time()
-        run_protocol(sender, receiver)
-        work_time = time() - start_time
-
-        print(f'corruption_rate = {corruption_rate}, message_num = {sender.get_sended_messages_num()}, work_time = {work_time}')
-        messages_nums.append(sender.get_sended_messages_num())
-        work_times.append(work_time)
-
-    plt.plot(corruption_rates, messages_nums if stat == Statistics.kMessageNum else work_times, label=f'window size = {window_size}')
+    plot_summaries([s.point.corruption_rate for s in summaries], summaries, stat, f'window size = {window_size}')
     if show_plot:
         plt.legend()
         plt.show()
@@ -75,23 +76,13 @@ def calculate_window_size_dependencies(
         corruption_rate: float,
         window_sizes: List[int],
         stat: Statistics,
-        show_plot: bool = True) -> None:
-    messages_nums = []
-    work_times = []
-
-    for window_size in window_sizes:
-        sender, receiver = net.SlidingWindowProtocol.create_connected(protocol_type, window_size, timeout, corruption_rate)
-        sender.set_max_messages_num(kMessagesToSend)
-
-        start_time = time()
-        run_protocol(sender, receiver)
-        work_time = time() - start_time
-
-        print(f'window_size = {window_size}, message_num = {sender.get_sended_messages_num()}, work_time = {work_time}')
-        messages_nums.append(sender.get_sended_messages_num())
-        work_times.append(work_time)
+        show_plot: bool = True,
+        table: sw.SweepTable = None) -> None:
+    points = sw.make_points([protocol_type], window_sizes, [timeout], [corruption_rate], kRepetitions, kMessagesToSend, kEngine)
+    table = table if table is not None else sw.SweepRunner(1).run(points)
+    summaries = table.summaries_of(points)
 
-    plt.plot(window_sizes, messages_nums if stat == Statistics.kMessageNum else work_times, label=f'corruption rate = {corruption_rate}')
+    plot_summaries([s.point.window_size for s in summaries], summaries, stat, f'corruption rate = {corruption_rate}')
     if show_plot:
         plt.legend()
         plt.show()
@@ -103,38 +94,33 @@ def calculate_timeout_dependencies(
         corruption_rate: float,
         timeouts: List[float],
         stat: Statistics,
-        show_plot: bool = True) -> None:
-    messages_nums = []
-    work_times = []
-
-    for timeout in timeouts:
-        sender, receiver = net.SlidingWindowProtocol.create_connected(protocol_type, window_size, timeout, corruption_rate)
-        sender.set_max_messages_num(kMessagesToSend)
-
-        start_time = time()
-        run_protocol(sender, receiver)
-        work_time = time() - start_time
+        show_plot: bool = True,
+        table: sw.SweepTable = None) -> None:
+    points = sw.make_points([protocol_type], [window_size], timeouts, [corruption_rate], kRepetitions, kMessagesToSend, kEngine)
+    table = table if table is not None else sw.SweepRunner(1).run(points)
+    summaries = table.summaries_of(points)
 
-        print(f'window_size = {window_size}, message_num = {sender.get_sended_messages_num()}, work_time = {work_time}')
-        messages_nums.append(sender.get_sended_messages_num())
-        work_times.append(work_time)
-
-    plt.plot(timeouts, messages_nums if stat == Statistics.kMessageNum else work_times, label=net.Protocol.to_str(protocol_type))
+    plot_summaries([s.point.timeout for s in summaries], summaries, stat, net.Protocol.to_str(protocol_type))
     if show_plot:
         plt.legend()
         plt.show()
 
 
+def size_rate_points(protocol_type: net.Protocol, timeout: float, window_sizes: List[int], corruption_rates: List[float]) -> List[sw.SweepPoint]:
+    return sw.make_points([protocol_type], window_sizes, [timeout], corruption_rates, kRepetitions, kMessagesToSend, kEngine)
+
 
 def calculate_size_rate_dependencies(
         protocol_type: net.Protocol,
         timeout: float,
         window_sizes: List[int],
         corruption_rates: List[float],
-        stat: Statistics) -> None:
+        stat: Statistics,
+        table: sw.SweepTable = None) -> None:
+    table = table if table is not None else sw.SweepRunner(1).run(size_rate_points(protocol_type, timeout, window_sizes, corruption_rates))
     
     for window_size in window_sizes:
-        calculate_corruption_rate_dependencies(protocol_type, window_size, timeout, corruption_rates, stat, False)
+        calculate_corruption_rate_dependencies(protocol_type, window_size, timeout, corruption_rates, stat, False, table)
 
     plt.legend()
     plt.xlabel('corruption rate')
@@ -144,15 +130,21 @@ def calculate_size_rate_dependencies(
     plt.clf()
 
 
+def rate_size_points(protocol_type: net.Protocol, timeout: float, corruption_rates: List[float], window_sizes: List[int]) -> List[sw.SweepPoint]:
+    return sw.make_points([protocol_type], window_sizes, [timeout], corruption_rates, kRepetitions, kMessagesToSend, kEngine)
+
+
 def calculate_rate_size_dependencies(
         protocol_type: net.Protocol,
         timeout: float,
         corruption_rates: List[float],
         window_sizes: List[int],
-        stat: Statistics) -> None:
+        stat: Statistics,
+        table: sw.SweepTable = None) -> None:
+    table = table if table is not None else sw.SweepRunner(1).run(rate_size_points(protocol_type, timeout, corruption_rates, window_sizes))
     
     for corruption_rate in corruption_rates:
-        calculate_window_size_dependencies(protocol_type, timeout, corruption_rate, window_sizes, stat, False)
+        calculate_window_size_dependencies(protocol_type, timeout, corruption_rate, window_sizes, stat, False, table)
 
     plt.legend()
     plt.xlabel('window size')
@@ -162,15 +154,21 @@ def calculate_rate_size_dependencies(
     plt.clf()
 
 
+def protocol_timeout_points(window_size: int, corruption_rate: float, protocol_types: List[net.Protocol], timeouts: List[float]) -> List[sw.SweepPoint]:
+    return sw.make_points(protocol_types, [window_size], timeouts, [corruption_rate], kRepetitions, kMessagesToSend, kEngine)
+
+
 def calculate_protocol_timeout_dependencies(
         window_size: int,
         corruption_rate: float,
         protocol_types: List[net.Protocol],
         timeouts: List[float],
-        stat: Statistics) -> None:
+        stat: Statistics,
+        table: sw.SweepTable = None) -> None:
+    table = table if table is not None else sw.SweepRunner(1).run(protocol_timeout_points(window_size, corruption_rate, protocol_types, timeouts))
     
     for protocol_type in protocol_types:
-        calculate_timeout_dependencies(protocol_type, window_size, corruption_rate, timeouts, stat, False)
+        calculate_timeout_dependencies(protocol_type, window_size, corruption_rate, timeouts, stat, False, table)
 
     plt.legend()
     plt.xlabel('timeout (in seconds)')
@@ -180,28 +178,86 @@ def calculate_protocol_timeout_dependencies(
     plt.clf()
 
 
-def main():
-    corruption_rates = np.linspace(0.0, 0.9, 19)
-    window_sizes = [int(x) for x in np.linspace(5, 50, 10)]
-    timeouts = np.linspace(0.02, 0.5, 30)
+def adaptive_timeout_points(
+        window_size: int,
+        corruption_rate: float,
+        loss_rate: float,
+        protocol_types: List[net.Protocol],
+        timeouts: List[float],
+        ack_mode: AckMode) -> List[sw.SweepPoint]:
+    return [
+        point
+        for adaptive_timeout in [False, True]
+        for point in sw.make_points(
+            protocol_types, [window_size], timeouts, [corruption_rate], kRepetitions, kMessagesToSend, kEngine,
+            loss_rate=loss_rate, adaptive_timeout=adaptive_timeout, ack_mode=ack_mode)
+    ]
 
-    calculate_size_rate_dependencies(net.Protocol.kSrp, 0.5, [10, 25, 50], corruption_rates, Statistics.kMessageNum)
-    calculate_rate_size_dependencies(net.Protocol.kSrp, 0.5, [0.1, 0.25, 0.5], window_sizes, Statistics.kMessageNum)
 
-    calculate_size_rate_dependencies(net.Protocol.kGbn, 0.5, [10, 25, 50], corruption_rates, Statistics.kMessageNum)
-    calculate_rate_size_dependencies(net.Protocol.kGbn, 0.5, [0.1, 0.25, 0.5], window_sizes, Statistics.kMessageNum)
+def calculate_adaptive_timeout_dependencies(
+        window_size: int,
+        corruption_rate: float,
+        loss_rate: float,
+        protocol_types: List[net.Protocol],
+        timeouts: List[float],
+        ack_mode: AckMode,
+        stat: Statistics,
+        table: sw.SweepTable = None) -> None:
+    if table is None:
+        table = sw.SweepRunner(1).run(adaptive_timeout_points(window_size, corruption_rate, loss_rate, protocol_types, timeouts, ack_mode))
 
-    calculate_size_rate_dependencies(net.Protocol.kSrp, 0.5, [10, 25, 50], corruption_rates, Statistics.kWorkingTime)
-    calculate_rate_size_dependencies(net.Protocol.kSrp, 0.5, [0.1, 0.25, 0.5], window_sizes, Statistics.kWorkingTime)
+    for protocol_type in protocol_types:
+        for adaptive_timeout in [False, True]:
+            points = sw.make_points(
+                [protocol_type], [window_size], timeouts, [corruption_rate], kRepetitions, kMessagesToSend, kEngine,
+                loss_rate=loss_rate, adaptive_timeout=adaptive_timeout, ack_mode=ack_mode)
+            summaries = table.summaries_of(points)
 
-    calculate_size_rate_dependencies(net.Protocol.kGbn, 0.5, [10, 25, 50], corruption_rates, Statistics.kWorkingTime)
-    calculate_rate_size_dependencies(net.Protocol.kGbn, 0.5, [0.1, 0.25, 0.5], window_sizes, Statistics.kWorkingTime)
+            label = f'{net.Protocol.to_str(protocol_type)}, {"adaptive" if adaptive_timeout else "fixed"} timeout'
+            plot_summaries([s.point.timeout for s in summaries], summaries, stat, label)
 
-    calculate_protocol_timeout_dependencies(10, 0.0, [net.Protocol.kGbn, net.Protocol.kSrp], timeouts, Statistics.kMessageNum)
-    calculate_protocol_timeout_dependencies(10, 0.0, [net.Protocol.kGbn, net.Protocol.kSrp], timeouts, Statistics.kWorkingTime)
+    plt.legend()
+    plt.xlabel('initial timeout (in seconds)')
+    plt.ylabel('total messages send' if stat == Statistics.kMessageNum else 'working time (in seconds)')
+    plt.title(f'loss rate = {loss_rate}, {AckMode.to_str(ack_mode)} acks')
+    ack_suffix = '' if ack_mode == AckMode.kPerPacket else AckMode.to_str(ack_mode).capitalize()
+    plt.savefig(f'{img_save_dst()}timeoutsAdaptive{ack_suffix}{Statistics.to_str(stat)}.png')
+    plt.clf()
 
+
+# the points of every figure go through the pool as one sweep, the figures are drawn from the gathered table.
+# Only the points missing from the cache are simulated, with plot_only nothing is simulated and the figures
+# are redrawn from cached results
+def main(plot_only: bool = False):
+    corruption_rates = np.linspace(0.0, 0.9, 19)
+    window_sizes = [int(x) for x in np.linspace(5, 50, 10)]
+    timeouts = np.linspace(0.02, 0.5, 30)
+    protocol_types = [net.Protocol.kGbn, net.Protocol.kSrp]
+
+    # the points a figure needs, the figure drawn from a table holding them, and the arguments both take
+    figures = [
+        (size_rate_points, calculate_size_rate_dependencies, (net.Protocol.kSrp, 0.5, [10, 25, 50], corruption_rates)),
+        (rate_size_points, calculate_rate_size_dependencies, (net.Protocol.kSrp, 0.5, [0.1, 0.25, 0.5], window_sizes)),
+        (size_rate_points, calculate_size_rate_dependencies, (net.Protocol.kGbn, 0.5, [10, 25, 50], corruption_rates)),
+        (rate_size_points, calculate_rate_size_dependencies, (net.Protocol.kGbn, 0.5, [0.1, 0.25, 0.5], window_sizes)),
+        (protocol_timeout_points, calculate_protocol_timeout_dependencies, (10, 0.0, protocol_types, timeouts)),
+        (adaptive_timeout_points, calculate_adaptive_timeout_dependencies, (10, 0.0, 0.1, protocol_types, timeouts, AckMode.kPerPacket)),
+        # delayed acks hold the rtt samples back, the rto has to stay above the ack delay
+        (adaptive_timeout_points, calculate_adaptive_timeout_dependencies, (10, 0.3, 0.2, protocol_types, timeouts, AckMode.kCumulative)),
+    ]
+
+    cache = ResultCache(kCachePath)
+    with sw.SweepRunner(cache=cache, compute_missing=not plot_only) as runner:
+        table = runner.run([point for make_points, _, args in figures for point in make_points(*args)])
+
+    for stat in [Statistics.kMessageNum, Statistics.kWorkingTime]:
+        for _, calculate_dependencies, args in figures:
+            calculate_dependencies(*args, stat, table)
+
+    print(f'cached points: {cache.hits}, simulated points: {cache.misses}')
+    cache.close()
     return
 
 
 if __name__ == '__main__':
-    main()
+    main('--plot-only' in sys.argv)
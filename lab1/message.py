@@ -0,0 +1,104 @@
+from __future__ import annotations
+from enum import Enum
+from typing import List
+import struct
+
+
+class MsgCode(Enum):
+    kSuccess = 0,
+    kFail = 1
+
+
+class PayloadKind(Enum):
+    kNone = 0
+    kInt = 1
+    kBytes = 2
+    kStr = 3
+    kSack = 4
+
+
+class AckMode(Enum):
+    kPerPacket = 0,
+    kCumulative = 1,
+    kSelective = 2
+
+    @staticmethod
+    def to_str(mode: AckMode) -> str:
+        if mode == AckMode.kPerPacket:
+            return 'per-packet'
+        elif mode == AckMode.kCumulative:
+            return 'cumulative'
+        elif mode == AckMode.kSelective:
+            return 'selective'
+
+        return ''
+
+
+class Message:
+    # id, code, payload kind, ack number; a payload of kind kBytes/kStr/kSack follows the header.
+    # Data frames carry their stream sequence number in the ack number field.
+    kHeader = struct.Struct('!qBBq')
+    # no per instance __dict__, every packet and ack in flight is one of these
+    __slots__ = ('id', 'code', 'data', 'sack', 'seq')
+
+    # sack is a bitmap of packets received above the cumulative ack in data:
+    # bit i stands for sequence number data + 2 + i
+    def __init__(self, id: int, code: MsgCode, data, sack: int = 0, seq: int = 0) -> None:
+        self.id = id
+        self.code = code
+        self.data = data
+        self.sack = sack
+        self.seq = seq
+
+    # header and payload as separate buffers, a bytes/memoryview payload is passed on without copying
+    def encode_parts(self) -> List:
+        code = 0 if self.code == MsgCode.kSuccess else 1
+
+        if self.sack != 0:
+            sack = self.sack.to_bytes((self.sack.bit_length() + 7) // 8, 'little')
+            return [Message.kHeader.pack(self.id, code, PayloadKind.kSack.value, self.data), sack]
+        elif self.data is None:
+            return [Message.kHeader.pack(self.id, code, PayloadKind.kNone.value, 0)]
+        elif isinstance(self.data, int):
+            return [Message.kHeader.pack(self.id, code, PayloadKind.kInt.value, self.data)]
+        elif isinstance(self.data, str):
+            return [Message.kHeader.pack(self.id, code, PayloadKind.kStr.value, self.seq), self.data.encode()]
+
+        return [Message.kHeader.pack(self.id, code, PayloadKind.kBytes.value, self.seq), self.data]
+
+    # length of the encoded frame without building it, only a non ascii str payload is encoded to be measured
+    def encoded_size(self) -> int:
+        if self.sack != 0:
+            return Message.kHeader.size + (self.sack.bit_length() + 7) // 8
+        elif self.data is None or isinstance(self.data, int):
+            return Message.kHeader.size
+        elif isinstance(self.data, str):
+            return Message.kHeader.size + (len(self.data) if self.data.isascii() else len(self.data.encode()))
+
+        return Message.kHeader.size + len(self.data)
+
+    def encode(self) -> bytes:
+        return b''.join(self.encode_parts())
+
+    @staticmethod
+    def decode(frame: bytes) -> Message:
+        id, code, kind, ack = Message.kHeader.unpack_from(frame)
+        code = MsgCode.kSuccess if code == 0 else MsgCode.kFail
+        kind = PayloadKind(kind)
+
+        data = None
+        sack = 0
+        seq = 0
+        if kind == PayloadKind.kInt:
+            data = ack
+        elif kind == PayloadKind.kSack:
+            data = ack
+            sack = int.from_bytes(frame[Message.kHeader.size:], 'little')
+        elif kind == PayloadKind.kStr:
+            data = bytes(frame[Message.kHeader.size:]).decode()
+            seq = ack
+        elif kind == PayloadKind.kBytes:
+            data = memoryview(frame)[Message.kHeader.size:]
+            seq = ack
+
+        return Message(id, code, data, sack, seq)
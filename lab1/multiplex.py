@@ -0,0 +1,221 @@
+from __future__ import annotations
+from collections import deque
+from enum import Enum
+from typing import Deque, Dict, List, NamedTuple, Tuple
+from scheduler import EventScheduler
+from transport import Transport
+from message import Message
+import protocol as net
+import numpy as np
+import heapq
+
+
+class LinkScheduling(Enum):
+    kRoundRobin = 0,
+    kFairQueue = 1
+
+    @staticmethod
+    def to_str(scheduling: LinkScheduling) -> str:
+        if scheduling == LinkScheduling.kRoundRobin:
+            return 'round-robin'
+        elif scheduling == LinkScheduling.kFairQueue:
+            return 'fair-queue'
+
+        return ''
+
+
+# One direction of a bottleneck link shared by many flows. Frames wait in per-flow queues,
+# the link serializes one frame at a time at `capacity` bytes per second.
+class SharedLink:
+    def __init__(
+            self,
+            scheduler: EventScheduler,
+            capacity: float,
+            scheduling: LinkScheduling = LinkScheduling.kRoundRobin,
+            queue_limit: int = 0) -> None:
+        assert capacity > 0.0
+        self.scheduler = scheduler
+        self.capacity = capacity
+        self.scheduling = scheduling
+        self.queue_limit = queue_limit
+        self.queues: Dict[int, Deque[Tuple[Message, object, int]]] = {}
+        self.weights: Dict[int, float] = {}
+        self.active_flows: Deque[int] = deque()
+        self.queued_frames = 0
+        self.busy = False
+        self.transmitted_bytes = 0
+        self.dropped_frames = 0
+        # fair queueing state: virtual finish time of the last frame of every flow
+        self.virtual_time = 0.0
+        self.last_finish: Dict[int, float] = {}
+        self.finish_heap: List[Tuple[float, int, int]] = []
+        self.frame_counter = 0
+
+    def add_flow(self, flow_id: int, weight: float = 1.0) -> None:
+        assert weight > 0.0
+        self.queues[flow_id] = deque()
+        self.weights[flow_id] = weight
+        self.last_finish[flow_id] = 0.0
+
+    def enqueue(self, flow_id: int, message: Message, peer) -> bool:
+        if self.queue_limit > 0 and self.queued_frames >= self.queue_limit:
+            # tail drop
+            self.dropped_frames += 1
+            return False
+
+        size = message.encoded_size()
+        queue = self.queues[flow_id]
+        if len(queue) == 0 and self.scheduling == LinkScheduling.kRoundRobin:
+            self.active_flows.append(flow_id)
+
+        if self.scheduling == LinkScheduling.kFairQueue:
+            finish = max(self.virtual_time, self.last_finish[flow_id]) + size / self.weights[flow_id]
+            self.last_finish[flow_id] = finish
+            heapq.heappush(self.finish_heap, (finish, self.frame_counter, flow_id))
+            self.frame_counter += 1
+
+        queue.append((message, peer, size))
+        self.queued_frames += 1
+
+        if not self.busy:
+            self.transmit_next()
+
+        return True
+
+    def next_flow(self) -> int:
+        if self.scheduling == LinkScheduling.kFairQueue:
+            finish, _, flow_id = heapq.heappop(self.finish_heap)
+            self.virtual_time = finish
+            return flow_id
+
+        flow_id = self.active_flows.popleft()
+        if len(self.queues[flow_id]) > 1:
+            self.active_flows.append(flow_id)
+
+        return flow_id
+
+    def transmit_next(self) -> None:
+        if self.queued_frames == 0:
+            self.busy = False
+            return
+
+        self.busy = True
+        message, peer, size = self.queues[self.next_flow()].popleft()
+        self.queued_frames -= 1
+        self.transmitted_bytes += size
+
+        def on_transmitted() -> None:
+            peer.get_message(message)
+            self.transmit_next()
+
+        self.scheduler.schedule(size / self.capacity, on_transmitted)
+
+
+class LinkTransport(Transport):
+    def __init__(self, link: SharedLink, flow_id: int, peer, loss_rate: float = 0.0, seed: int = None) -> None:
+        super().__init__(loss_rate, seed)
+        self.link = link
+        self.flow_id = flow_id
+        self.peer = peer
+
+    def transmit(self, message: Message) -> None:
+        if not self.link.enqueue(self.flow_id, message, self.peer):
+            self.lost_frames += 1
+
+
+class FlowReport(NamedTuple):
+    flow_id: int
+    completion_time: float
+    sended_messages_num: int
+    delivered_messages_num: int
+    retransmission_ratio: float
+
+
+class MultiplexReport(NamedTuple):
+    flows: List[FlowReport]
+    makespan: float
+    throughput: float
+    forward_bytes_per_second: float
+    retransmission_ratio: float
+
+    def print(self) -> None:
+        completion_times = np.array([f.completion_time for f in self.flows])
+        print(f'flows = {len(self.flows)}, makespan = {self.makespan}, throughput = {self.throughput} messages/s')
+        print(f'completion time: mean = {completion_times.mean()}, p50 = {np.percentile(completion_times, 50)}, '
+              f'p99 = {np.percentile(completion_times, 99)}, max = {completion_times.max()}')
+        print(f'retransmission ratio = {self.retransmission_ratio}')
+
+
+class ConnectionManager:
+    def __init__(
+            self,
+            protocol_type: net.Protocol,
+            flows_num: int,
+            window_size: int,
+            timeout: float,
+            corruption_rate: float,
+            capacity: float,
+            scheduling: LinkScheduling = LinkScheduling.kRoundRobin,
+            queue_limit: int = 0,
+            link_delay: float = 0.001,
+            seed: int = 0) -> None:
+        self.scheduler = EventScheduler(link_delay)
+        self.forward_link = SharedLink(self.scheduler, capacity, scheduling, queue_limit)
+        self.backward_link = SharedLink(self.scheduler, capacity, scheduling, queue_limit)
+        self.connections: List[Tuple[net.SlidingWindowSender, net.SlidingWindowReceiver]] = []
+
+        for flow_id in range(flows_num):
+            sender, receiver = net.SlidingWindowProtocol.create_connected(
+                protocol_type, window_size, timeout, corruption_rate, net.Engine.kEvent, self.scheduler, seed + flow_id)
+
+            self.forward_link.add_flow(flow_id)
+            self.backward_link.add_flow(flow_id)
+            sender.set_transport(LinkTransport(self.forward_link, flow_id, receiver))
+            receiver.set_transport(LinkTransport(self.backward_link, flow_id, sender))
+
+            self.connections.append((sender, receiver))
+
+    def set_max_messages_num(self, messages_num: int) -> None:
+        for sender, _ in self.connections:
+            sender.set_max_messages_num(messages_num)
+
+    def set_weight(self, flow_id: int, weight: float) -> None:
+        self.forward_link.weights[flow_id] = weight
+        self.backward_link.weights[flow_id] = weight
+
+    def run(self) -> MultiplexReport:
+        start_time = self.scheduler.get_current_time()
+        for sender, receiver in self.connections:
+            sender.run()
+            receiver.run()
+
+        self.scheduler.run()
+
+        flows = []
+        for flow_id, (sender, _) in enumerate(self.connections):
+            assert sender.is_finished()
+            sended = sender.get_sended_messages_num()
+            delivered = sender.max_messages_num
+            flows.append(FlowReport(flow_id, sender.finish_time - start_time, sended, delivered, (sended - delivered) / sended))
+
+        makespan = max(f.completion_time for f in flows)
+        total_sended = sum(f.sended_messages_num for f in flows)
+        total_delivered = sum(f.delivered_messages_num for f in flows)
+        forward_bytes_per_second = self.forward_link.transmitted_bytes / makespan
+
+        return MultiplexReport(flows, makespan, total_delivered / makespan, forward_bytes_per_second, (total_sended - total_delivered) / total_sended)
+
+
+def main():
+    for protocol_type in [net.Protocol.kGbn, net.Protocol.kSrp]:
+        for scheduling in [LinkScheduling.kRoundRobin, LinkScheduling.kFairQueue]:
+            for flows_num in [1, 10, 100, 1000]:
+                manager = ConnectionManager(protocol_type, flows_num, 10, 0.5, 0.1, 1e7, scheduling)
+                manager.set_max_messages_num(100)
+
+                print(f'{net.Protocol.to_str(protocol_type)}, {LinkScheduling.to_str(scheduling)}')
+                manager.run().print()
+
+
+if __name__ == '__main__':
+    main()
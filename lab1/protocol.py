@@ -2,8 +2,19 @@ from __future__ import annotations
 from abc import ABC, abstractmethod
 from enum import Enum
 from typing import List, Dict, Tuple
-from numpy import random as rnd
+from math import inf
+import asyncio
+import heapq
 from time import time, sleep
+from scheduler import EventScheduler, ScheduledEvent, AsyncioScheduler
+from channel import Channel, ChannelType
+from reorder import ReorderBuffer
+from message import Message, MsgCode, AckMode
+from transport import Transport, TransportType, InProcessTransport, UdpTransport
+from rto import RtoEstimator
+from loss import BernoulliLoss
+from link import LinkProfile, EmulatedLinkTransport
+from instrument import Tracer, TraceEvent
 
 
 def get_current_time() -> float:
@@ -32,16 +43,21 @@ class Protocol(Enum):
         
         return ''
 
-class MsgCode(Enum):
-    kSuccess = 0,
-    kFail = 1
+class Engine(Enum):
+    kThreaded = 0,
+    kEvent = 1,
+    kAsyncio = 2
 
+    @staticmethod
+    def to_str(engine: Engine) -> str:
+        if engine == Engine.kThreaded:
+            return 'threaded'
+        elif engine == Engine.kEvent:
+            return 'event-driven'
+        elif engine == Engine.kAsyncio:
+            return 'asyncio'
 
-class Message:
-    def __init__(self, id: int, code: MsgCode, data) -> None:
-        self.id = id
-        self.code = code
-        self.data = data
+        return ''
 
 
 class SlidingWindowProtocol(ABC):
@@ -54,28 +70,129 @@ class SlidingWindowProtocol(ABC):
             type: Protocol,
             window_size: int,
             timeout: float,
-            corruption_rate: float) -> Tuple[SlidingWindowSender, SlidingWindowReceiver]:
+            corruption_rate: float,
+            engine: Engine = Engine.kThreaded,
+            scheduler: EventScheduler = None,
+            seed: int = None,
+            channel_type: ChannelType = ChannelType.kUnbounded,
+            channel_capacity: int = 0,
+            transport_type: TransportType = TransportType.kInProcess,
+            loss_rate: float = 0.0,
+            adaptive_timeout: bool = False,
+            ack_mode: AckMode = AckMode.kPerPacket,
+            ack_every: int = 2,
+            ack_delay: float = 0.005,
+            tracer: Tracer = None,
+            link_profile: LinkProfile = None) -> Tuple[SlidingWindowSender, SlidingWindowReceiver]:
         sender: SlidingWindowSender = None
         receiver: SlidingWindowReceiver = None
 
-        if type == Protocol.kGbn:
-            sender = GoBackNSender(window_size, timeout)
-            receiver = GoBackNReceiver(corruption_rate)
-        elif type == Protocol.kSrp:
-            sender = SelectiveRepeatSender(window_size, timeout)
-            receiver = SelectiveReapetReceiver(corruption_rate)
+        if engine == Engine.kEvent and scheduler is None:
+            # an emulated link brings its own propagation delay
+            scheduler = EventScheduler(0.0 if transport_type == TransportType.kEmulatedLink else 0.001)
+
+        if engine == Engine.kThreaded:
+            if type == Protocol.kGbn:
+                sender = GoBackNSender(window_size, timeout)
+                receiver = GoBackNReceiver(corruption_rate, seed)
+            elif type == Protocol.kSrp:
+                sender = SelectiveRepeatSender(window_size, timeout)
+                receiver = SelectiveReapetReceiver(corruption_rate, seed)
+            else:
+                assert False
+        elif engine == Engine.kEvent:
+            if type == Protocol.kGbn:
+                sender = EventGoBackNSender(window_size, timeout, scheduler)
+                receiver = EventGoBackNReceiver(corruption_rate, scheduler, seed)
+            elif type == Protocol.kSrp:
+                sender = EventSelectiveRepeatSender(window_size, timeout, scheduler)
+                receiver = EventSelectiveRepeatReceiver(corruption_rate, scheduler, seed)
+            else:
+                assert False
+        elif engine == Engine.kAsyncio:
+            scheduler = scheduler if scheduler is not None else AsyncioScheduler()
+            if type == Protocol.kGbn:
+                sender = AsyncGoBackNSender(window_size, timeout, scheduler)
+                receiver = AsyncGoBackNReceiver(corruption_rate, scheduler, seed)
+            elif type == Protocol.kSrp:
+                sender = AsyncSelectiveRepeatSender(window_size, timeout, scheduler)
+                receiver = AsyncSelectiveRepeatReceiver(corruption_rate, scheduler, seed)
+            else:
+                assert False
         else:
             assert False
         
+        if engine == Engine.kThreaded:
+            sender.set_channel(Channel.create(channel_type, channel_capacity))
+            receiver.set_channel(Channel.create(channel_type, channel_capacity))
+
         SlidingWindowProtocol.connect(sender, receiver)
+
+        receiver.set_ack_mode(ack_mode, ack_every, ack_delay)
+
+        if adaptive_timeout:
+            # the fixed timeout becomes the initial retransmission timeout
+            sender.enable_adaptive_timeout(ack_delay=0.0 if ack_mode == AckMode.kPerPacket else ack_delay)
+
+        if tracer is not None:
+            sender.set_tracer(tracer)
+            receiver.set_tracer(tracer)
+
+        if transport_type == TransportType.kUdp:
+            # sockets are read by background threads, only the threaded endpoints can consume them
+            assert engine == Engine.kThreaded
+            sender_transport, receiver_transport = UdpTransport.create_pair(sender, receiver, loss_rate, seed)
+            sender.set_transport(sender_transport)
+            receiver.set_transport(receiver_transport)
+        elif transport_type == TransportType.kEmulatedLink:
+            # delays and timers need a scheduler, the same profile applies to both directions
+            assert engine != Engine.kThreaded
+            link_profile = link_profile if link_profile is not None else LinkProfile(loss_rate=loss_rate)
+            sender.set_transport(EmulatedLinkTransport(scheduler, receiver, link_profile, seed))
+            receiver.set_transport(EmulatedLinkTransport(scheduler, sender, link_profile, None if seed is None else seed + 1))
+        elif loss_rate > 0.0:
+            sender.set_transport(InProcessTransport(receiver, loss_rate, seed))
+            receiver.set_transport(InProcessTransport(sender, loss_rate, None if seed is None else seed + 1))
+
         return sender, receiver
 
     def __init__(self) -> None:
         super().__init__()
-        self.message_queue: List[Message] = []
+        self.message_queue: Channel = Channel.create(ChannelType.kUnbounded)
+        self.scheduler: EventScheduler = None
+        self.transport: Transport = None
+        self.tracer: Tracer = None
+
+    def set_channel(self, channel: Channel) -> None:
+        assert channel is not None
+        self.message_queue = channel
+
+    def set_transport(self, transport: Transport) -> None:
+        assert transport is not None
+        self.transport = transport
+
+    def set_tracer(self, tracer: Tracer) -> None:
+        self.tracer = tracer
+
+    # call sites test self.tracer first, so an untraced endpoint pays for an attribute check only
+    def trace(self, event: TraceEvent, message_id: int = -1, seq: int = -1) -> None:
+        self.tracer.record(self.get_time(), event, message_id, seq, self.get_window_occupancy())
+
+    def get_window_occupancy(self) -> int:
+        return 0
 
     def get_message(self, message: Message) -> None:
-        self.message_queue.append(message)
+        self.message_queue.put(message)
+
+    def get_time(self) -> float:
+        if self.scheduler is not None:
+            return self.scheduler.get_current_time()
+
+        return get_current_time()
+
+    def close(self) -> None:
+        if self.transport is not None:
+            self.transport.close()
 
     @abstractmethod
     def run(self) -> None:
@@ -90,19 +207,67 @@ class SlidingWindowSender(SlidingWindowProtocol):
         self.timeout_time = timeout_time
         self.max_messages_num = 100
         self.finished = False
+        self.finish_time: float = None
         self.message_counter = 0
+        self.rto_estimator: RtoEstimator = None
+        self.last_backoff_time = -inf
+        self.payload: memoryview = None
+        self.mss = 0
 
     def connect(self, receiver: SlidingWindowReceiver) -> None:
         assert receiver is not None
         self.receiver = receiver
+        self.transport = InProcessTransport(receiver)
 
     def set_max_messages_num(self, messages_num: int) -> None:
         assert messages_num > 0
         self.max_messages_num = messages_num
 
+    # streams data instead of dummy messages, segment n is the memoryview slice [n * mss, (n + 1) * mss)
+    # of data, so neither sending nor retransmitting copies the payload
+    def set_payload(self, data, mss: int) -> None:
+        assert mss > 0
+        self.payload = memoryview(data).cast('B')
+        self.mss = mss
+        self.set_max_messages_num(max(1, (len(self.payload) + mss - 1) // mss))
+
+    def make_data_message(self, message_id: int, seq: int) -> Message:
+        if self.payload is None:
+            return Message(message_id, MsgCode.kSuccess, self.dummy_data, seq=seq)
+
+        return Message(message_id, MsgCode.kSuccess, self.payload[seq * self.mss:(seq + 1) * self.mss], seq=seq)
+
+    # a receiver that delays its acks holds them up to ack_delay, the rto never drops below that
+    def enable_adaptive_timeout(self, min_rto: float = 0.001, max_rto: float = 60.0, ack_delay: float = 0.0) -> None:
+        self.rto_estimator = RtoEstimator(self.timeout_time, min_rto + ack_delay, max_rto)
+
+    def get_timeout(self) -> float:
+        if self.rto_estimator is not None:
+            return self.rto_estimator.get_rto()
+
+        return self.timeout_time
+
+    def sample_rtt(self, send_time: float) -> None:
+        if self.rto_estimator is not None:
+            self.rto_estimator.sample(self.get_time() - send_time)
+
+    # an ack that moves the window base proves the path works even when Karn's rule leaves no sample
+    def on_window_advance(self) -> None:
+        if self.rto_estimator is not None:
+            self.rto_estimator.reset_backoff()
+
+    def on_retransmission_timeout(self, send_time: float, message_id: int = -1) -> None:
+        if self.tracer is not None:
+            self.trace(TraceEvent.kTimeout, message_id)
+
+        # timers armed before the last backoff expire as a burst, back off once per burst
+        if self.rto_estimator is not None and send_time >= self.last_backoff_time:
+            self.rto_estimator.on_timeout()
+            self.last_backoff_time = self.get_time()
+
     def send_message_to_receiver(self, message: Message) -> None:
         self.message_counter += 1
-        self.receiver.get_message(message)
+        self.transport.send(message)
 
     def is_finished(self) -> bool:
         return self.finished
@@ -112,20 +277,88 @@ class SlidingWindowSender(SlidingWindowProtocol):
 
 
 class SlidingWindowReceiver(SlidingWindowProtocol):
-    def __init__(self, corruption_rate: float) -> None:
+    def __init__(self, corruption_rate: float, seed: int = None) -> None:
         super().__init__()
         self.sender: SlidingWindowSender = None
         self.corruption_rate = max(min(corruption_rate, 1.0), 0.0)
-        self.rnd = rnd.default_rng()
+        # answers are corrupted with corruption_rate, drawn in batches like link losses
+        self.corruption_model = BernoulliLoss(self.corruption_rate, seed)
+        self.ack_mode = AckMode.kPerPacket
+        self.ack_every = 1
+        self.ack_delay = 0.0
+        self.pending_acks = 0
+        self.ack_deadline: float = None
+        self.flush_event: ScheduledEvent = None
+        self.delivered_num = 0
+        self.stream: bytearray = None
+        self.stream_offset = 0
 
     def connect(self, sender: SlidingWindowSender) -> None:
         assert sender is not None
         self.sender = sender
+        self.transport = InProcessTransport(sender)
+
+    def send_message_to_sender(self, message: Message) -> None:
+        self.transport.send(message)
+
+    # preallocated buffer the in order payloads are reassembled into
+    def set_stream_buffer(self, size: int) -> None:
+        self.stream = bytearray(size)
+        self.stream_offset = 0
+
+    def deliver(self, seq: int, data) -> None:
+        # in order hand over to the application
+        self.delivered_num += 1
+        if self.tracer is not None:
+            self.trace(TraceEvent.kDeliver, seq=seq)
+
+        if self.stream is not None:
+            self.stream[self.stream_offset:self.stream_offset + len(data)] = data
+            self.stream_offset += len(data)
+
+    # outside of kPerPacket successful packets are acknowledged together, once ack_every of them
+    # are pending or ack_delay after the first one
+    def set_ack_mode(self, ack_mode: AckMode, ack_every: int = 2, ack_delay: float = 0.005) -> None:
+        assert ack_every > 0 and ack_delay >= 0.0
+        self.ack_mode = ack_mode
+        self.ack_every = ack_every
+        self.ack_delay = ack_delay
+
+    def add_pending_ack(self) -> None:
+        self.pending_acks += 1
+        if self.pending_acks >= self.ack_every:
+            self.flush_acks()
+        elif self.pending_acks == 1:
+            self.ack_deadline = self.get_time() + self.ack_delay
+            if self.scheduler is not None:
+                self.flush_event = self.scheduler.schedule(self.ack_delay, self.on_ack_delay)
+
+    def on_ack_delay(self) -> None:
+        self.flush_event = None
+        if not self.sender.is_finished():
+            self.flush_acks()
+
+    def flush_acks(self) -> None:
+        if self.flush_event is not None:
+            self.flush_event.cancel()
+            self.flush_event = None
+
+        if self.pending_acks > 0:
+            self.pending_acks = 0
+            self.ack_deadline = None
+            self.send_message_to_sender(self.make_aggregated_ack())
+
+    # a steady stream of packets never lets a threaded receiver's get() time out, so the
+    # delayed ack deadline is checked after every message as well
+    def is_ack_overdue(self) -> bool:
+        return self.ack_deadline is not None and self.get_time() >= self.ack_deadline
 
-    def prepare_answer(self, message_id: int) -> Message:
-        corruption_rnd = self.rnd.uniform(0.0, 1.0)
+    @abstractmethod
+    def make_aggregated_ack(self) -> Message:
+        pass
 
-        if corruption_rnd < self.corruption_rate:
+    def prepare_answer(self, message_id: int) -> Message:
+        if self.corruption_model.is_lost():
             # corrupted
             return Message(message_id, MsgCode.kFail, None)
 
@@ -141,6 +374,11 @@ class GoBackNSender(SlidingWindowSender):
         self.send_next = 0
         self.message_id = 0
         self.waiting_message_id = 0
+        # sequence numbers of the messages in flight, kept across move backs so a late ack of an
+        # earlier transmission can still move the window base
+        self.sent_seqs: Dict[int, int] = {}
+        # send times of the messages in flight, kept only for rtt sampling
+        self.send_times: Dict[int, float] = {}
         self.dummy_data = 'go back n sender data'
 
     def run(self) -> None:
@@ -150,75 +388,169 @@ class GoBackNSender(SlidingWindowSender):
             handle_error = False
 
             if (self.send_next - self.send_base < self.window_size) and (self.send_next < self.max_messages_num):
-                send_message = Message(self.message_id, MsgCode.kSuccess, self.dummy_data)
+                send_message = self.make_data_message(self.message_id, self.send_next)
                 self.send_message_to_receiver(send_message)
         
                 self.send_base_time = get_current_time()
+                self.record_send(send_message.id, send_message.seq)
                 self.send_next += 1
                 self.message_id += 1
+                if self.tracer is not None:
+                    self.trace(TraceEvent.kSend, send_message.id, send_message.seq)
                 # print(f'sender send id {send_message.id}')
-            
-            if self.remove_outdated_messages() > 0:
-                #print(f'message info, id = {self.message_queue[0].id}, waiting = {self.waiting_message_id}')
-
-                if self.message_queue[0].id == self.waiting_message_id and self.message_queue[0].code == MsgCode.kSuccess:
-                    self.send_base += 1
-                    self.waiting_message_id += 1
-                    del self.message_queue[0]
+            else:
+                # window is full, sleep until an ack arrives or the base times out
+                self.message_queue.wait(self.send_base_time + self.get_timeout())
+
+            for message in self.message_queue.drain():
+                if message.id < self.waiting_message_id:
+                    # an earlier transmission, its ack may still carry the window base
+                    self.acknowledge_late(message)
+                    continue
+
+                if self.is_acceptable_ack(message):
+                    if self.tracer is not None:
+                        self.trace(TraceEvent.kAck, message.id)
+                    self.acknowledge(self.get_run_start_id(message), message.id)
                     #print(f'sender move window, new base {self.send_base}')
                 else:
+                    # the acks left in the batch are checked against the new transmission
+                    if self.tracer is not None:
+                        self.trace(TraceEvent.kNack, message.id)
                     handle_error = True
+                    self.move_back()
 
-            if handle_error or self.time_since_base_send() > self.timeout_time:
+            if not handle_error and self.time_since_base_send() > self.get_timeout():
+                self.on_retransmission_timeout(self.send_base_time, self.waiting_message_id)
                 #print(f'moved back to {self.send_next - self.send_base}')
-                self.send_next = self.send_base
-                self.waiting_message_id = self.message_id
+                self.move_back()
 
         self.finished = True
+        self.receiver.message_queue.close()
         #print(f'GBN total sended: {self.message_counter}')
 
-    def remove_outdated_messages(self) -> int:
-        timouted_messages = 0
-        queue_size = len(self.message_queue)
-
-        if queue_size > 0:
-            while timouted_messages < queue_size and self.message_queue[timouted_messages].id < self.waiting_message_id:
-                timouted_messages += 1
-
-            if timouted_messages > 0:
-                #print(f'outdated removed: {timouted_messages}')
-                del self.message_queue[0:timouted_messages]
-                #print(f'head = {self.message_queue[0].id if len(self.message_queue) > 0 else -1}, wating = {self.waiting_message_id}')
-
-        return queue_size - timouted_messages
-
     def time_since_base_send(self) -> float:
         return get_current_time() - self.send_base_time
+
+    def record_send(self, message_id: int, seq: int) -> None:
+        self.sent_seqs[message_id] = seq
+        if self.rto_estimator is not None:
+            self.send_times[message_id] = self.get_time()
+
+    # a cumulative ack carries the first id of its run in data
+    @staticmethod
+    def get_run_start_id(message: Message) -> int:
+        return message.id if message.data is None else message.data
+
+    # the run must not start past the first id of the current transmission
+    def is_acceptable_ack(self, message: Message) -> bool:
+        return message.code == MsgCode.kSuccess and self.get_run_start_id(message) <= self.waiting_message_id <= message.id
+
+    # an ack of a transmission before the last move back arrives after a timeout shorter than the round trip,
+    # dropping it would leave the window base waiting forever
+    def acknowledge_late(self, message: Message) -> None:
+        if message.code == MsgCode.kSuccess:
+            self.acknowledge(self.get_run_start_id(message), message.id)
+
+    # The receiver delivers in order and the links do not reorder, so a successful ack of the packet holding
+    # the window base proves everything up to it was delivered; the base moves by sequence number, whichever
+    # transmission the ack belongs to. Every transmission gets a fresh message id, so each ack names exactly
+    # one send and Karn's rule never has to discard a sample.
+    def acknowledge(self, run_start_id: int, message_id: int) -> None:
+        send_base = self.send_base
+        for acked_id in range(run_start_id, message_id + 1):
+            if self.sent_seqs.pop(acked_id, -1) == self.send_base:
+                self.send_base += 1
+
+        if self.rto_estimator is not None:
+            for acked_id in range(run_start_id, message_id):
+                self.send_times.pop(acked_id, None)
+            send_time = self.send_times.pop(message_id, None)
+            if send_time is not None:
+                self.sample_rtt(send_time)
+
+        self.waiting_message_id = max(self.waiting_message_id, message_id + 1)
+        # packets acked through an earlier transmission are not sent again
+        self.send_next = max(self.send_next, self.send_base)
+        if self.tracer is not None and self.send_base > send_base:
+            self.trace(TraceEvent.kWindowAdvance, message_id, self.send_base)
+
+    # resend from the window base; the messages still in flight keep their sequence numbers unless
+    # they are below the base already
+    def move_back(self) -> None:
+        self.send_next = self.send_base
+        self.waiting_message_id = self.message_id
+        self.sent_seqs = {message_id: seq for message_id, seq in self.sent_seqs.items() if seq >= self.send_base}
+        self.send_times = {message_id: self.send_times[message_id] for message_id in self.sent_seqs if message_id in self.send_times}
+
+    def get_window_occupancy(self) -> int:
+        return self.send_next - self.send_base
     
 
 class GoBackNReceiver(SlidingWindowReceiver):
-    def __init__(self, corruption_rate: float) -> None:
-        super().__init__(corruption_rate)
+    def __init__(self, corruption_rate: float, seed: int = None) -> None:
+        super().__init__(corruption_rate, seed)
         self.last_received = 0
+        self.expected_seq = 0
+        # consecutive message ids received since the last gap, a cumulative ack covers [run_start_id, run_last_id]
+        self.run_start_id: int = None
+        self.run_last_id: int = None
 
     def run(self) -> None:
         #print('receiver start work')
 
         while not self.sender.is_finished():
-            if len(self.message_queue) > 0:
-                current_message = self.message_queue[0]
+            current_message = self.message_queue.get(self.ack_deadline)
 
-                send_message = self.prepare_answer(current_message.id)
-                self.sender.get_message(send_message)
-
-                del self.message_queue[0]
+            if current_message is not None:
+                self.handle_message(current_message)
                 # print(f'receiver receive={current_message.id}')
 
+            if self.is_ack_overdue():
+                self.flush_acks()
+
+    def handle_message(self, message: Message) -> None:
+        send_message = self.prepare_answer(message.id)
+
+        # go back n keeps no buffer, anything but the next in order packet is dropped
+        if send_message.code == MsgCode.kSuccess:
+            if message.seq == self.expected_seq:
+                self.deliver(message.seq, message.data)
+                self.expected_seq += 1
+            elif self.tracer is not None:
+                self.trace(TraceEvent.kDiscard, message.id, message.seq)
+
+        if self.ack_mode == AckMode.kPerPacket:
+            self.send_message_to_sender(send_message)
+            return
+
+        # go back n has no use for a selective bitmap, kSelective acks cumulatively as well
+        if send_message.code == MsgCode.kFail or (self.run_last_id is not None and message.id != self.run_last_id + 1):
+            self.flush_acks()
+            self.run_start_id = None
+
+        if send_message.code == MsgCode.kFail:
+            self.send_message_to_sender(send_message)
+            return
+
+        if self.run_start_id is None:
+            self.run_start_id = message.id
+
+        self.run_last_id = message.id
+        self.add_pending_ack()
+
+    def make_aggregated_ack(self) -> Message:
+        return Message(self.run_last_id, MsgCode.kSuccess, self.run_start_id)
+
 
 class SelectiveRepeatSender(SlidingWindowSender):
     class MessageNode:
+        __slots__ = ('send_time', 'deadline', 'sends_num', 'message')
+
         def __init__(self, send_time: float, message: Message) -> None:
             self.send_time = send_time
+            self.deadline = inf
+            self.sends_num = 0
             self.message = message
 
     def __init__(self, window_size: int, timeout_time: float) -> None:
@@ -226,57 +558,147 @@ class SelectiveRepeatSender(SlidingWindowSender):
         self.last_approved = 0
         self.send_next = 0
         self.message_nodes: Dict[int, SelectiveRepeatSender.MessageNode] = {}
+        self.cumulative_acked = -1
+        # send time of the newest packet sent once among those the current ack releases
+        self.rtt_send_time: float = None
+        # (deadline, message id), entries of acked or resent packets are dropped lazily
+        self.timer_heap: List[Tuple[float, int]] = []
         self.dummy_data = 'selective repeat dummy data'
 
     def run(self) -> None:
         while self.finished == False:
-            queue_size = len(self.message_queue)
-            while queue_size > 0:
-                message = self.message_queue[0]
+            for message in self.message_queue.drain():
                 self.last_approved = max(self.last_approved, message.data)
 
                 if self.last_approved >= self.max_messages_num - 1:
                     self.finished = True
                     break
 
+                if self.tracer is not None:
+                    self.trace(TraceEvent.kAck if message.code == MsgCode.kSuccess else TraceEvent.kNack, message.id, message.data)
+                self.release_acked_nodes(message)
+
                 if message.id in self.message_nodes:
                     if message.code == MsgCode.kSuccess:
-                        del self.message_nodes[message.id]
+                        self.release_node(message.id)
                     else:
-                        self.send_message_to_receiver(self.message_nodes[message.id].message)
-                        self.message_nodes[message.id].send_time = get_current_time()
+                        self.acknowledge(self.message_nodes[message.id])
+                        self.send_node(self.message_nodes[message.id])
 
-                del self.message_queue[0]
-                queue_size -= 1
+                self.sample_ack_rtt()
 
-            if len(self.message_nodes) < self.window_size and self.send_next < self.max_messages_num:
-                send_message = Message(self.send_next, MsgCode.kSuccess, self.dummy_data)
+            if self.finished:
+                break
 
-                self.send_message_to_receiver(send_message)
-                self.message_nodes[self.send_next] =  SelectiveRepeatSender.MessageNode(get_current_time(), send_message)
-
-                self.send_next += 1
-
-            for message_node_idx in self.message_nodes:
-                message_node = self.message_nodes[message_node_idx]
+            if len(self.message_nodes) < self.window_size and self.send_next < self.max_messages_num:
+                self.send_new_message()
+            else:
+                # nothing to send, sleep until an ack arrives or the oldest packet times out
+                self.message_queue.wait(self.next_timeout_time())
 
-                if self.is_outdated(message_node.send_time):
-                    self.send_message_to_receiver(message_node.message)
-                    self.message_nodes[message_node.message.id].send_time = get_current_time()
-                    #print(f'repeat outdated {message_node.message.id}')
+            self.resend_outdated_messages()
 
+        self.receiver.message_queue.close()
         #print(f'SRP total sended: {self.message_counter}')
 
-    def is_outdated(self, send_time: float) -> bool:
-        #print(f'current = {get_current_time()}, send = {send_time}')
-        return get_current_time() - send_time > self.timeout_time
+    def send_new_message(self) -> None:
+        send_message = self.make_data_message(self.send_next, self.send_next)
+        self.message_nodes[self.send_next] = SelectiveRepeatSender.MessageNode(get_current_time(), send_message)
+        self.send_node(self.message_nodes[self.send_next])
+
+        self.send_next += 1
+
+    def send_node(self, message_node: SelectiveRepeatSender.MessageNode) -> None:
+        self.send_message_to_receiver(message_node.message)
+        message_node.send_time = get_current_time()
+        message_node.sends_num += 1
+        message_node.deadline = message_node.send_time + self.get_timeout()
+        heapq.heappush(self.timer_heap, (message_node.deadline, message_node.message.id))
+        if self.tracer is not None:
+            self.trace(TraceEvent.kSend, message_node.message.id, message_node.message.seq)
+
+    def is_timer_alive(self, deadline: float, message_id: int) -> bool:
+        message_node = self.message_nodes.get(message_id)
+        return message_node is not None and message_node.deadline == deadline
+
+    def resend_outdated_messages(self) -> None:
+        current_time = get_current_time()
+
+        while len(self.timer_heap) > 0 and self.timer_heap[0][0] < current_time:
+            deadline, message_id = heapq.heappop(self.timer_heap)
+
+            if self.is_timer_alive(deadline, message_id):
+                self.on_retransmission_timeout(self.message_nodes[message_id].send_time, message_id)
+                self.send_node(self.message_nodes[message_id])
+                #print(f'repeat outdated {message_id}')
+
+    def next_timeout_time(self) -> float:
+        while len(self.timer_heap) > 0 and not self.is_timer_alive(*self.timer_heap[0]):
+            heapq.heappop(self.timer_heap)
+
+        if len(self.timer_heap) == 0:
+            return None
+
+        return self.timer_heap[0][0]
+
+    def release_node(self, message_id: int) -> None:
+        self.acknowledge(self.message_nodes.pop(message_id))
+        if self.tracer is not None:
+            self.trace(TraceEvent.kWindowAdvance, message_id, message_id)
+
+    def get_window_occupancy(self) -> int:
+        return len(self.message_nodes)
+
+    def release_acked_nodes(self, message: Message) -> None:
+        if message.data > self.cumulative_acked:
+            self.on_window_advance()
+
+        # everything up to the receiver window base has arrived
+        while self.cumulative_acked < message.data:
+            self.cumulative_acked += 1
+            if self.cumulative_acked in self.message_nodes:
+                self.release_node(self.cumulative_acked)
+
+        sack = message.sack
+        if sack.bit_count() > len(self.message_nodes):
+            # the bitmap is mostly packets released earlier, test the outstanding ones instead
+            for message_id in [i for i in self.message_nodes if i > message.data + 1 and (sack >> (i - message.data - 2)) & 1]:
+                self.release_node(message_id)
+            return
+
+        while sack != 0:
+            # visit set bits only, lowest first
+            lowest_bit = sack & -sack
+            message_id = message.data + 1 + lowest_bit.bit_length()
+            if message_id in self.message_nodes:
+                self.release_node(message_id)
+
+            sack ^= lowest_bit
+
+    # Karn's rule: the ack of a resent packet may belong to any of its copies. A cumulative or selective
+    # ack releases many packets, the older ones waited at the receiver behind a gap, so only the newest
+    # packet sent once gives the sample
+    def acknowledge(self, message_node: SelectiveRepeatSender.MessageNode) -> None:
+        if message_node.sends_num == 1 and (self.rtt_send_time is None or message_node.send_time > self.rtt_send_time):
+            self.rtt_send_time = message_node.send_time
+
+    def sample_ack_rtt(self) -> None:
+        if self.rtt_send_time is not None:
+            self.sample_rtt(self.rtt_send_time)
+            self.rtt_send_time = None
 
 
 class SelectiveReapetReceiver(SlidingWindowReceiver):
-    def __init__(self, corruption_rate: float) -> None:
-        super().__init__(corruption_rate)
+    kMaxSackBits = 1024
+
+    def __init__(self, corruption_rate: float, seed: int = None) -> None:
+        super().__init__(corruption_rate, seed)
         self.last_received = -1
-        self.received: List[int] = []
+        self.reorder_buffer = ReorderBuffer(1)
+
+    def connect(self, sender: SlidingWindowSender) -> None:
+        super().connect(sender)
+        self.reorder_buffer = ReorderBuffer(sender.window_size)
 
     def run(self) -> None:
         info_send_time = get_current_time()
@@ -284,31 +706,325 @@ class SelectiveReapetReceiver(SlidingWindowReceiver):
         while not self.sender.is_finished():
             self.resolve_last_received()
 
-            if len(self.message_queue) > 0:
-                current_message = self.message_queue[0]
+            deadline = info_send_time + 0.01
+            if self.ack_deadline is not None:
+                deadline = min(deadline, self.ack_deadline)
+
+            current_message = self.message_queue.get(deadline)
+            if current_message is not None:
+                if self.ack_mode != AckMode.kPerPacket:
+                    self.handle_aggregated(current_message)
+                    if self.is_ack_overdue():
+                        self.flush_acks()
+                    continue
 
                 send_message = self.prepare_answer(current_message.id)
                 send_message.data = self.last_received
-                self.sender.get_message(send_message)
+                self.send_message_to_sender(send_message)
 
                 if send_message.code == MsgCode.kSuccess:
-                    self.received.append(send_message.id)
+                    self.buffer_message(current_message)
 
-                del self.message_queue[0]
+            elif self.is_ack_overdue():
+                self.flush_acks()
 
             elif get_current_time() - info_send_time > 0.01: # exta safe
                 info_send_time = get_current_time()
-                self.sender.get_message(Message(-1, MsgCode.kSuccess, self.last_received))
+                if self.ack_mode == AckMode.kPerPacket:
+                    self.send_message_to_sender(Message(-1, MsgCode.kSuccess, self.last_received))
+                else:
+                    self.send_message_to_sender(self.make_aggregated_ack())
+
+    def handle_aggregated(self, message: Message) -> None:
+        send_message = self.prepare_answer(message.id)
+
+        if send_message.code == MsgCode.kFail:
+            # a corrupted packet is reported at once, the sender repeats it without waiting for a timeout
+            send_message.data = self.last_received
+            self.send_message_to_sender(send_message)
+            return
+
+        self.buffer_message(message)
+        self.resolve_last_received()
+        self.add_pending_ack()
+
+    def make_aggregated_ack(self) -> Message:
+        if self.ack_mode == AckMode.kSelective:
+            return Message(-1, MsgCode.kSuccess, self.last_received, self.reorder_buffer.bitmap(SelectiveReapetReceiver.kMaxSackBits))
+
+        return Message(-1, MsgCode.kSuccess, self.last_received)
+
+    def buffer_message(self, message: Message) -> None:
+        if not self.reorder_buffer.insert(message.id, message.data) and self.tracer is not None:
+            self.trace(TraceEvent.kDiscard, message.id, message.seq)
 
     def resolve_last_received(self) -> None:
-        i = 0
-        while i < len(self.received):
-            if self.received[i] <= self.last_received:
-                del self.received[i]
-                i -= 1
+        seq = self.reorder_buffer.base
+        for data in self.reorder_buffer.pop_ready():
+            self.deliver(seq, data)
+            seq += 1
+
+        self.last_received = self.reorder_buffer.base - 1
+    
+
+# Event-driven endpoints: the same protocol state as the threaded classes above,
+# but every delivery and timeout is an event on a shared virtual-clock scheduler.
+class EventGoBackNSender(GoBackNSender):
+    def __init__(self, window_size: int, timeout_time: float, scheduler: EventScheduler) -> None:
+        super().__init__(window_size, timeout_time)
+        self.scheduler = scheduler
+        self.send_base_time = scheduler.get_current_time()
+        self.timeout_event: ScheduledEvent = None
+
+    def get_message(self, message: Message) -> None:
+        self.scheduler.deliver(lambda: self.on_message(message))
+
+    def run(self) -> None:
+        self.fill_window()
+
+    def fill_window(self) -> None:
+        while (self.send_next - self.send_base < self.window_size) and (self.send_next < self.max_messages_num):
+            send_message = self.make_data_message(self.message_id, self.send_next)
+            self.send_message_to_receiver(send_message)
+            self.record_send(send_message.id, send_message.seq)
+
+            self.send_next += 1
+            self.message_id += 1
+            if self.tracer is not None:
+                self.trace(TraceEvent.kSend, send_message.id, send_message.seq)
+            self.restart_timer()
+
+    def restart_timer(self) -> None:
+        if self.timeout_event is not None:
+            self.timeout_event.cancel()
+
+        self.send_base_time = self.scheduler.get_current_time()
+        self.timeout_event = self.scheduler.schedule(self.get_timeout(), self.on_timeout)
+
+    def on_message(self, message: Message) -> None:
+        if self.finished:
+            return
+
+        if message.id < self.waiting_message_id:
+            # an earlier transmission, its ack may still carry the window base
+            self.acknowledge_late(message)
+        elif self.is_acceptable_ack(message):
+            if self.tracer is not None:
+                self.trace(TraceEvent.kAck, message.id)
+            self.acknowledge(self.get_run_start_id(message), message.id)
+        else:
+            if self.tracer is not None:
+                self.trace(TraceEvent.kNack, message.id)
+            self.move_back()
+
+        if self.send_base >= self.max_messages_num:
+            self.finish()
+            return
+
+        self.fill_window()
+
+    def on_timeout(self) -> None:
+        self.timeout_event = None
+        if self.finished:
+            return
+
+        self.on_retransmission_timeout(self.send_base_time, self.waiting_message_id)
+        self.move_back()
+        self.fill_window()
+
+    def finish(self) -> None:
+        self.finished = True
+        self.finish_time = self.scheduler.get_current_time()
+        if self.timeout_event is not None:
+            self.timeout_event.cancel()
+            self.timeout_event = None
+
+
+class EventGoBackNReceiver(GoBackNReceiver):
+    def __init__(self, corruption_rate: float, scheduler: EventScheduler, seed: int = None) -> None:
+        super().__init__(corruption_rate, seed)
+        self.scheduler = scheduler
+
+    def get_message(self, message: Message) -> None:
+        self.scheduler.deliver(lambda: self.on_message(message))
+
+    def run(self) -> None:
+        pass
+
+    def on_message(self, message: Message) -> None:
+        if self.sender.is_finished():
+            return
+
+        self.handle_message(message)
+
+
+class EventSelectiveRepeatSender(SelectiveRepeatSender):
+    def __init__(self, window_size: int, timeout_time: float, scheduler: EventScheduler) -> None:
+        super().__init__(window_size, timeout_time)
+        self.scheduler = scheduler
+        self.timeout_events: Dict[int, ScheduledEvent] = {}
+
+    def get_message(self, message: Message) -> None:
+        self.scheduler.deliver(lambda: self.on_message(message))
+
+    def run(self) -> None:
+        self.fill_window()
+
+    def fill_window(self) -> None:
+        while len(self.message_nodes) < self.window_size and self.send_next < self.max_messages_num:
+            send_message = self.make_data_message(self.send_next, self.send_next)
+            self.message_nodes[self.send_next] = SelectiveRepeatSender.MessageNode(self.scheduler.get_current_time(), send_message)
+            self.send_with_timer(send_message)
+
+            self.send_next += 1
+
+    def send_with_timer(self, message: Message) -> None:
+        self.send_message_to_receiver(message)
+        self.message_nodes[message.id].send_time = self.scheduler.get_current_time()
+        self.message_nodes[message.id].sends_num += 1
+
+        message_id = message.id
+        self.timeout_events[message_id] = self.scheduler.schedule(self.get_timeout(), lambda: self.on_timeout(message_id))
+        if self.tracer is not None:
+            self.trace(TraceEvent.kSend, message.id, message.seq)
+
+    def on_message(self, message: Message) -> None:
+        if self.finished:
+            return
+
+        self.last_approved = max(self.last_approved, message.data)
+        if self.last_approved >= self.max_messages_num - 1:
+            self.finish()
+            return
+
+        if self.tracer is not None:
+            self.trace(TraceEvent.kAck if message.code == MsgCode.kSuccess else TraceEvent.kNack, message.id, message.data)
+        self.release_acked_nodes(message)
+
+        if message.id in self.message_nodes:
+            if message.code == MsgCode.kSuccess:
+                self.release_node(message.id)
+            else:
+                self.timeout_events.pop(message.id).cancel()
+                self.acknowledge(self.message_nodes[message.id])
+                self.send_with_timer(self.message_nodes[message.id].message)
+
+        self.sample_ack_rtt()
+        self.fill_window()
+
+    def release_node(self, message_id: int) -> None:
+        self.timeout_events.pop(message_id).cancel()
+        super().release_node(message_id)
+
+    def on_timeout(self, message_id: int) -> None:
+        del self.timeout_events[message_id]
+        self.on_retransmission_timeout(self.message_nodes[message_id].send_time, message_id)
+        self.send_with_timer(self.message_nodes[message_id].message)
+
+    def finish(self) -> None:
+        self.finished = True
+        self.finish_time = self.scheduler.get_current_time()
+        for timeout_event in self.timeout_events.values():
+            timeout_event.cancel()
+        self.timeout_events.clear()
+
+
+class EventSelectiveRepeatReceiver(SelectiveReapetReceiver):
+    def __init__(self, corruption_rate: float, scheduler: EventScheduler, seed: int = None) -> None:
+        super().__init__(corruption_rate, seed)
+        self.scheduler = scheduler
+
+    def get_message(self, message: Message) -> None:
+        self.scheduler.deliver(lambda: self.on_message(message))
+
+    def run(self) -> None:
+        pass
+
+    def on_message(self, message: Message) -> None:
+        if self.sender.is_finished():
+            return
+
+        if self.ack_mode != AckMode.kPerPacket:
+            self.handle_aggregated(message)
+            return
+
+        send_message = self.prepare_answer(message.id)
+        if send_message.code == MsgCode.kSuccess:
+            self.buffer_message(message)
+            self.resolve_last_received()
+
+        # no periodic status pings: every answer carries the up to date window base
+        send_message.data = self.last_received
+        self.send_message_to_sender(send_message)
+
+
+# asyncio endpoints: the event-driven protocol logic driven by coroutines. Deliveries go through
+# an asyncio.Queue per endpoint and timers are loop.call_later handles, so many connections can
+# share one event loop.
+class AsyncEndpoint:
+    def init_inbox(self) -> None:
+        self.inbox: asyncio.Queue = asyncio.Queue()
+
+    def get_message(self, message: Message) -> None:
+        self.inbox.put_nowait(message)
+
+    def stop(self) -> None:
+        # wakes up run_async of an endpoint waiting for its next message
+        self.inbox.put_nowait(None)
+
+    async def run_async(self) -> None:
+        self.run()
+
+        while not self.is_done():
+            message = await self.inbox.get()
+            if message is None:
+                break
+
+            self.on_message(message)
+
+    def is_done(self) -> bool:
+        return False
+
+
+class AsyncGoBackNSender(AsyncEndpoint, EventGoBackNSender):
+    def __init__(self, window_size: int, timeout_time: float, scheduler: AsyncioScheduler) -> None:
+        super().__init__(window_size, timeout_time, scheduler)
+        self.init_inbox()
+
+    def is_done(self) -> bool:
+        return self.finished
+
+    def finish(self) -> None:
+        super().finish()
+        self.receiver.stop()
+
+
+class AsyncGoBackNReceiver(AsyncEndpoint, EventGoBackNReceiver):
+    def __init__(self, corruption_rate: float, scheduler: AsyncioScheduler, seed: int = None) -> None:
+        super().__init__(corruption_rate, scheduler, seed)
+        self.init_inbox()
+
+    def is_done(self) -> bool:
+        return self.sender.is_finished()
+
+
+class AsyncSelectiveRepeatSender(AsyncEndpoint, EventSelectiveRepeatSender):
+    def __init__(self, window_size: int, timeout_time: float, scheduler: AsyncioScheduler) -> None:
+        super().__init__(window_size, timeout_time, scheduler)
+        self.init_inbox()
+
+    def is_done(self) -> bool:
+        return self.finished
+
+    def finish(self) -> None:
+        super().finish()
+        self.receiver.stop()
+
 
-            elif self.received[i] == self.last_received + 1:
-                self.last_received += 1
+class AsyncSelectiveRepeatReceiver(AsyncEndpoint, EventSelectiveRepeatReceiver):
+    def __init__(self, corruption_rate: float, scheduler: AsyncioScheduler, seed: int = None) -> None:
+        super().__init__(corruption_rate, scheduler, seed)
+        self.init_inbox()
 
-            i += 1
-    
\ No newline at end of file
+    def is_done(self) -> bool:
+        return self.sender.is_finished()
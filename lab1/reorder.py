@@ -0,0 +1,74 @@
+from __future__ import annotations
+from typing import List
+
+
+class ReorderBuffer:
+    def __init__(self, capacity: int) -> None:
+        self.capacity = 1
+        while self.capacity < max(capacity, 1):
+            self.capacity *= 2
+
+        # slot of sequence number n is n & mask, base is the next in-order sequence number
+        self.mask = self.capacity - 1
+        self.base = 0
+        self.highest = -1
+        self.present = bytearray(self.capacity)
+        self.payloads: List = [None] * self.capacity
+
+    def insert(self, seq: int, payload) -> bool:
+        if seq < self.base:
+            # already delivered
+            return False
+
+        if seq - self.base >= self.capacity:
+            self.grow(seq - self.base + 1)
+
+        slot = seq & self.mask
+        if self.present[slot]:
+            # duplicate of a buffered packet
+            return False
+
+        self.present[slot] = 1
+        self.payloads[slot] = payload
+        self.highest = max(self.highest, seq)
+        return True
+
+    def pop_ready(self) -> List:
+        ready = []
+
+        slot = self.base & self.mask
+        while self.present[slot]:
+            ready.append(self.payloads[slot])
+            self.present[slot] = 0
+            self.payloads[slot] = None
+
+            self.base += 1
+            slot = self.base & self.mask
+
+        return ready
+
+    # bit i is set when sequence number base + 1 + i is buffered, base itself is always missing
+    def bitmap(self, max_bits: int) -> int:
+        bitmap = 0
+        last = min(self.highest, self.base + max_bits)
+        for seq in range(last, self.base, -1):
+            bitmap = (bitmap << 1) | self.present[seq & self.mask]
+
+        return bitmap
+
+    def grow(self, needed: int) -> None:
+        capacity = self.capacity
+        while capacity < needed:
+            capacity *= 2
+
+        present = bytearray(capacity)
+        payloads = [None] * capacity
+        for seq in range(self.base, self.base + self.capacity):
+            if self.present[seq & self.mask]:
+                present[seq & (capacity - 1)] = 1
+                payloads[seq & (capacity - 1)] = self.payloads[seq & self.mask]
+
+        self.capacity = capacity
+        self.mask = capacity - 1
+        self.present = present
+        self.payloads = payloads
@@ -0,0 +1,49 @@
+from __future__ import annotations
+
+
+# Retransmission timeout estimation after Jacobson/Karels (RFC 6298). Callers feed RTT samples
+# only for packets that were sent once (Karn's rule) and report timeouts for exponential backoff.
+# The backoff ends with a fresh sample or once the sender's window moves again.
+class RtoEstimator:
+    kAlpha = 1.0 / 8.0
+    kBeta = 1.0 / 4.0
+    kK = 4.0
+
+    def __init__(self, initial_rto: float, min_rto: float = 0.001, max_rto: float = 60.0, granularity: float = 0.001) -> None:
+        assert 0.0 < min_rto <= max_rto
+        self.granularity = granularity
+        self.min_rto = min_rto
+        self.max_rto = max_rto
+        self.srtt: float = None
+        self.rttvar: float = None
+        self.base_rto = self.clamp(initial_rto)
+        self.backoff_factor = 1
+        self.samples_num = 0
+        self.timeouts_num = 0
+
+    def clamp(self, rto: float) -> float:
+        return min(max(rto, self.min_rto), self.max_rto)
+
+    def sample(self, rtt: float) -> None:
+        if self.srtt is None:
+            self.srtt = rtt
+            self.rttvar = rtt / 2.0
+        else:
+            self.rttvar = (1.0 - RtoEstimator.kBeta) * self.rttvar + RtoEstimator.kBeta * abs(self.srtt - rtt)
+            self.srtt = (1.0 - RtoEstimator.kAlpha) * self.srtt + RtoEstimator.kAlpha * rtt
+
+        self.base_rto = self.clamp(self.srtt + max(self.granularity, RtoEstimator.kK * self.rttvar))
+        # a fresh sample means the path is alive again
+        self.backoff_factor = 1
+        self.samples_num += 1
+
+    def reset_backoff(self) -> None:
+        self.backoff_factor = 1
+
+    def on_timeout(self) -> None:
+        self.timeouts_num += 1
+        if self.base_rto * self.backoff_factor < self.max_rto:
+            self.backoff_factor *= 2
+
+    def get_rto(self) -> float:
+        return self.clamp(self.base_rto * self.backoff_factor)
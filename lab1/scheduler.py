@@ -0,0 +1,78 @@
+from __future__ import annotations
+from typing import Callable, List, Tuple
+from time import monotonic
+import asyncio
+import heapq
+
+
+class ScheduledEvent:
+    __slots__ = ('fire_time', 'callback', 'cancelled')
+
+    def __init__(self, fire_time: float, callback: Callable[[], None]) -> None:
+        self.fire_time = fire_time
+        self.callback = callback
+        self.cancelled = False
+
+    def cancel(self) -> None:
+        self.cancelled = True
+
+
+class EventScheduler:
+    def __init__(self, link_delay: float = 0.001) -> None:
+        self.current_time = 0.0
+        self.link_delay = link_delay
+        self.events: List[Tuple[float, int, ScheduledEvent]] = []
+        self.event_counter = 0
+
+    def get_current_time(self) -> float:
+        return self.current_time
+
+    def schedule(self, delay: float, callback: Callable[[], None]) -> ScheduledEvent:
+        assert delay >= 0.0
+        event = ScheduledEvent(self.current_time + delay, callback)
+
+        # counter keeps events with equal fire time in scheduling order
+        heapq.heappush(self.events, (event.fire_time, self.event_counter, event))
+        self.event_counter += 1
+
+        return event
+
+    def deliver(self, callback: Callable[[], None]) -> ScheduledEvent:
+        return self.schedule(self.link_delay, callback)
+
+    def is_empty(self) -> bool:
+        return len(self.events) == 0
+
+    def step(self) -> bool:
+        while len(self.events) > 0:
+            fire_time, _, event = heapq.heappop(self.events)
+            if event.cancelled:
+                continue
+
+            self.current_time = fire_time
+            event.callback()
+            return True
+
+        return False
+
+    def run(self, until: float = None) -> None:
+        while len(self.events) > 0:
+            if until is not None and self.events[0][0] > until:
+                self.current_time = until
+                break
+
+            self.step()
+
+
+# Same interface as EventScheduler on top of a running asyncio loop: timers are loop.call_later
+# handles and deliveries are callbacks on the next loop iteration.
+class AsyncioScheduler:
+    def get_current_time(self) -> float:
+        return monotonic()
+
+    def schedule(self, delay: float, callback: Callable[[], None]) -> asyncio.TimerHandle:
+        assert delay >= 0.0
+        return asyncio.get_running_loop().call_later(delay, callback)
+
+    def deliver(self, callback: Callable[[], None]) -> asyncio.Handle:
+        return asyncio.get_running_loop().call_soon(callback)
@@ -0,0 +1,209 @@
+from __future__ import annotations
+from concurrent.futures import ProcessPoolExecutor
+from itertools import product
+from threading import Thread
+from typing import Dict, List, NamedTuple, Tuple
+from time import time
+from link import LinkProfile
+from message import AckMode
+from transport import TransportType
+import protocol as net
+import numpy as np
+import asyncio
+import os
+
+
+class SweepPoint(NamedTuple):
+    protocol: net.Protocol
+    window_size: int
+    timeout: float
+    corruption_rate: float
+    seed: int
+    messages_num: int = 100
+    engine: net.Engine = net.Engine.kEvent
+    loss_rate: float = 0.0
+    adaptive_timeout: bool = False
+    # runs over an emulated link when set
+    link_profile: LinkProfile = None
+    ack_mode: AckMode = AckMode.kPerPacket
+
+
+class SweepResult(NamedTuple):
+    point: SweepPoint
+    sended_messages_num: int
+    work_time: float
+
+
+class SweepSummary(NamedTuple):
+    point: SweepPoint
+    repetitions: int
+    sended_messages_mean: float
+    sended_messages_std: float
+    work_time_mean: float
+    work_time_std: float
+
+
+async def run_connections(connections: List[Tuple[net.SlidingWindowSender, net.SlidingWindowReceiver]]) -> None:
+    await asyncio.gather(*[endpoint.run_async() for connection in connections for endpoint in connection])
+
+
+def run_protocol(sender: net.SlidingWindowSender, receiver: net.SlidingWindowReceiver) -> None:
+    if isinstance(sender, net.AsyncEndpoint):
+        asyncio.run(run_connections([(sender, receiver)]))
+        return
+
+    if sender.scheduler is not None:
+        sender.run()
+        receiver.run()
+        sender.scheduler.run()
+        return
+
+    sender_thread = Thread(target=sender.run)
+    receiver_thread = Thread(target=receiver.run)
+
+    sender_thread.start()
+    receiver_thread.start()
+
+    sender_thread.join()
+    receiver_thread.join()
+
+    sender.close()
+    receiver.close()
+
+
+def measure_protocol(sender: net.SlidingWindowSender, receiver: net.SlidingWindowReceiver) -> float:
+    if sender.scheduler is not None and not isinstance(sender, net.AsyncEndpoint):
+        # simulated working time, independent of the host load
+        start_time = sender.scheduler.get_current_time()
+        run_protocol(sender, receiver)
+        return sender.scheduler.get_current_time() - start_time
+
+    start_time = time()
+    run_protocol(sender, receiver)
+    return time() - start_time
+
+
+def run_point(point: SweepPoint) -> SweepResult:
+    sender, receiver = net.SlidingWindowProtocol.create_connected(
+        point.protocol, point.window_size, point.timeout, point.corruption_rate, point.engine, seed=point.seed,
+        loss_rate=point.loss_rate, adaptive_timeout=point.adaptive_timeout,
+        transport_type=TransportType.kInProcess if point.link_profile is None else TransportType.kEmulatedLink,
+        link_profile=point.link_profile, ack_mode=point.ack_mode)
+    sender.set_max_messages_num(point.messages_num)
+
+    work_time = measure_protocol(sender, receiver)
+    return SweepResult(point, sender.get_sended_messages_num(), work_time)
+
+
+def make_points(
+        protocol_types: List[net.Protocol],
+        window_sizes: List[int],
+        timeouts: List[float],
+        corruption_rates: List[float],
+        repetitions: int = 1,
+        messages_num: int = 100,
+        engine: net.Engine = net.Engine.kEvent,
+        base_seed: int = 0,
+        loss_rate: float = 0.0,
+        adaptive_timeout: bool = False,
+        link_profile: LinkProfile = None,
+        ack_mode: AckMode = AckMode.kPerPacket) -> List[SweepPoint]:
+    assert repetitions > 0
+    return [
+        SweepPoint(
+            protocol_type, int(window_size), float(timeout), float(corruption_rate), base_seed + rep, messages_num, engine,
+            loss_rate, adaptive_timeout, link_profile, ack_mode)
+        for protocol_type, window_size, timeout, corruption_rate, rep
+        in product(protocol_types, window_sizes, timeouts, corruption_rates, range(repetitions))
+    ]
+
+
+class SweepTable:
+    def __init__(self, results: List[SweepResult]) -> None:
+        self.results = results
+
+    # repetitions of the same configuration differ only by seed
+    @staticmethod
+    def configuration(point: SweepPoint) -> SweepPoint:
+        return point._replace(seed=0)
+
+    def summarize(self) -> List[SweepSummary]:
+        groups: Dict[SweepPoint, List[SweepResult]] = {}
+        for result in self.results:
+            groups.setdefault(SweepTable.configuration(result.point), []).append(result)
+
+        summaries = []
+        for point, results in groups.items():
+            sended = np.array([r.sended_messages_num for r in results], dtype=float)
+            work_times = np.array([r.work_time for r in results], dtype=float)
+            summaries.append(SweepSummary(
+                point, len(results),
+                float(sended.mean()), float(sended.std()),
+                float(work_times.mean()), float(work_times.std())))
+
+        return summaries
+
+    # summaries of the configurations of points, in the order they first appear
+    def summaries_of(self, points: List[SweepPoint]) -> List[SweepSummary]:
+        summaries = {s.point: s for s in self.summarize()}
+        return [summaries[configuration] for configuration in dict.fromkeys(SweepTable.configuration(p) for p in points)]
+
+    def select(self, **fields) -> List[SweepSummary]:
+        return [s for s in self.summarize() if all(getattr(s.point, k) == v for k, v in fields.items())]
+
+    def rows(self) -> List[Tuple]:
+        return [
+            (net.Protocol.to_short_str(s.point.protocol), s.point.window_size, s.point.timeout, s.point.corruption_rate,
+             s.point.loss_rate, s.point.adaptive_timeout, AckMode.to_str(s.point.ack_mode), s.repetitions, s.sended_messages_mean, s.sended_messages_std, s.work_time_mean, s.work_time_std)
+            for s in self.summarize()
+        ]
+
+    def print(self) -> None:
+        print('protocol\twindow\ttimeout\trate\tloss\tadaptive\tack_mode\treps\tmessages\tmessages_std\twork_time\twork_time_std')
+        for row in self.rows():
+            print('\t'.join(str(v) for v in row))
+
+
+# Runs sweep points, in a process pool when workers > 1. With a cache (cache.ResultCache) only the points
+# it does not know are simulated; without compute_missing every point has to be cached already.
+class SweepRunner:
+    def __init__(self, workers: int = None, cache=None, compute_missing: bool = True) -> None:
+        self.workers = workers if workers is not None else (os.cpu_count() or 1)
+        self.executor: ProcessPoolExecutor = None
+        self.cache = cache
+        self.compute_missing = compute_missing
+
+    def __enter__(self) -> SweepRunner:
+        if self.workers > 1:
+            self.executor = ProcessPoolExecutor(self.workers)
+        return self
+
+    def __exit__(self, *args) -> None:
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
+
+    def run(self, points: List[SweepPoint]) -> SweepTable:
+        # figures share points, each one is simulated once
+        points = list(dict.fromkeys(points))
+        if self.cache is None:
+            return SweepTable(self.compute(points))
+
+        results = self.cache.get_many(points)
+        missing = [point for point, result in zip(points, results) if result is None]
+        if len(missing) > 0:
+            assert self.compute_missing, f'{len(missing)} sweep points are not cached'
+            computed = self.compute(missing)
+            self.cache.put_many(computed)
+
+            computed_iter = iter(computed)
+            results = [result if result is not None else next(computed_iter) for result in results]
+
+        return SweepTable(results)
+
+    def compute(self, points: List[SweepPoint]) -> List[SweepResult]:
+        if self.executor is None or len(points) == 0:
+            return [run_point(point) for point in points]
+
+        chunksize = max(1, len(points) // (4 * self.workers))
+        return list(self.executor.map(run_point, points, chunksize=chunksize))
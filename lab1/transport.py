@@ -0,0 +1,129 @@
+from __future__ import annotations
+from abc import ABC, abstractmethod
+from enum import Enum
+from threading import Thread
+from typing import Tuple
+from message import Message
+from loss import LossModel, BernoulliLoss
+import socket
+
+
+class TransportType(Enum):
+    kInProcess = 0,
+    kUdp = 1,
+    kEmulatedLink = 2
+
+    @staticmethod
+    def to_str(type: TransportType) -> str:
+        if type == TransportType.kInProcess:
+            return 'in-process'
+        elif type == TransportType.kUdp:
+            return 'udp'
+        elif type == TransportType.kEmulatedLink:
+            return 'emulated-link'
+
+        return ''
+
+
+class Transport(ABC):
+    def __init__(self, loss_rate: float = 0.0, seed: int = None, loss_model: LossModel = None) -> None:
+        self.loss_model = loss_model if loss_model is not None else BernoulliLoss(loss_rate, seed)
+        self.loss_rate = self.loss_model.get_loss_rate()
+        self.sended_frames = 0
+        self.lost_frames = 0
+
+    def send(self, message: Message) -> None:
+        self.sended_frames += 1
+
+        if self.loss_model.is_lost():
+            self.lost_frames += 1
+            return
+
+        self.transmit(message)
+
+    @abstractmethod
+    def transmit(self, message: Message) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+class InProcessTransport(Transport):
+    def __init__(self, peer, loss_rate: float = 0.0, seed: int = None) -> None:
+        super().__init__(loss_rate, seed)
+        self.peer = peer
+
+    def transmit(self, message: Message) -> None:
+        self.peer.get_message(message)
+
+
+class UdpTransport(Transport):
+    kMaxFrameSize = 65507
+    kSocketBufferSize = 1 << 22
+
+    @staticmethod
+    def create_pair(first, second, loss_rate: float = 0.0, seed: int = None) -> Tuple[UdpTransport, UdpTransport]:
+        first_transport = UdpTransport(first, loss_rate, seed)
+        second_transport = UdpTransport(second, loss_rate, None if seed is None else seed + 1)
+
+        first_transport.connect(second_transport.address)
+        second_transport.connect(first_transport.address)
+
+        first_transport.start()
+        second_transport.start()
+
+        return first_transport, second_transport
+
+    def __init__(self, owner, loss_rate: float = 0.0, seed: int = None) -> None:
+        super().__init__(loss_rate, seed)
+        self.owner = owner
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, UdpTransport.kSocketBufferSize)
+        self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, UdpTransport.kSocketBufferSize)
+        self.socket.bind(('127.0.0.1', 0))
+        self.socket.settimeout(0.05)
+        self.address = self.socket.getsockname()
+        self.peer_address = None
+        self.received_bytes = 0
+        self.sended_bytes = 0
+        self.reader: Thread = None
+        self.closed = False
+
+    def connect(self, peer_address) -> None:
+        self.peer_address = peer_address
+
+    def start(self) -> None:
+        self.reader = Thread(target=self.read_frames, daemon=True)
+        self.reader.start()
+
+    def transmit(self, message: Message) -> None:
+        # scatter-gather send, payload memory goes to the kernel without an intermediate frame copy
+        parts = message.encode_parts()
+        assert sum(len(part) for part in parts) <= UdpTransport.kMaxFrameSize
+
+        try:
+            self.sended_bytes += self.socket.sendmsg(parts, [], 0, self.peer_address)
+        except (BlockingIOError, OSError):
+            # kernel buffer is full or the socket is closing, same as a lost frame
+            self.lost_frames += 1
+
+    def read_frames(self) -> None:
+        while not self.closed:
+            try:
+                frame = self.socket.recv(UdpTransport.kMaxFrameSize)
+            except socket.timeout:
+                continue
+            except OSError:
+                break
+
+            self.received_bytes += len(frame)
+            self.owner.get_message(Message.decode(frame))
+
+    def close(self) -> None:
+        self.closed = True
+        if self.reader is not None:
+            self.reader.join()
+            self.reader = None
+
+        self.socket.close()
@@ -0,0 +1,162 @@
+from __future__ import annotations
+from concurrent.futures import Future, ProcessPoolExecutor
+from collections import deque
+from multiprocessing.shared_memory import SharedMemory
+from typing import Deque, List, NamedTuple, Tuple
+from network import Network, csr_dijkstra
+from tables import RoutingTableWriter
+import numpy as np
+import os
+
+
+class CsrGraph(NamedTuple):
+    # edges of node i are indices[indptr[i]:indptr[i + 1]] with the matching weights
+    indptr: np.ndarray
+    indices: np.ndarray
+    weights: np.ndarray
+
+
+# next_hops[k][j] is the neighbour of sources[k] on its shortest path to j: the source itself for j == sources[k],
+# -1 for unreachable nodes
+class RoutingTables(NamedTuple):
+    sources: np.ndarray
+    next_hops: np.ndarray
+    distances: np.ndarray
+
+
+def csr_graph(network: Network) -> CsrGraph:
+    network.build_graph()
+    return CsrGraph(network.indptr, network.indices, network.weights)
+
+
+# (name, dtype, shape) is all a process needs to map an array placed in shared memory
+ArraySpec = Tuple[str, str, Tuple[int, ...]]
+
+
+class SharedArrays:
+    def __init__(self) -> None:
+        self.blocks: List[SharedMemory] = []
+        self.specs: List[ArraySpec] = []
+
+    def create(self, shape: Tuple[int, ...], dtype) -> np.ndarray:
+        dtype = np.dtype(dtype)
+        block = SharedMemory(create=True, size=max(1, int(np.prod(shape)) * dtype.itemsize))
+        self.blocks.append(block)
+        self.specs.append((block.name, dtype.str, shape))
+        return np.ndarray(shape, dtype, block.buf)
+
+    def copy(self, array: np.ndarray) -> np.ndarray:
+        shared = self.create(array.shape, array.dtype)
+        shared[...] = array
+        return shared
+
+    def __enter__(self) -> SharedArrays:
+        return self
+
+    def __exit__(self, *args) -> None:
+        for block in self.blocks:
+            block.close()
+            block.unlink()
+
+
+# state of a pool process: the graph as python lists and the shared result matrices, if there are any
+worker_blocks: List[SharedMemory] = []
+worker_lists: Tuple[List[int], List[int], List[float]] = None
+worker_next_hops: np.ndarray = None
+worker_distances: np.ndarray = None
+
+
+def attach_worker(specs: List[ArraySpec]) -> None:
+    global worker_lists, worker_next_hops, worker_distances
+
+    arrays = []
+    for name, dtype, shape in specs:
+        block = SharedMemory(name=name)
+        worker_blocks.append(block)
+        arrays.append(np.ndarray(shape, np.dtype(dtype), block.buf))
+
+    indptr, indices, weights = arrays[:3]
+    if len(arrays) > 3:
+        worker_next_hops, worker_distances = arrays[3:]
+    worker_lists = (indptr.tolist(), indices.tolist(), weights.tolist())
+
+
+# the same dijkstra as network_dijkstra, so next hops follow the same paths
+def solve_source(source: int) -> Tuple[List[int], List[float]]:
+    settled = []
+    tree = csr_dijkstra(*worker_lists, source, settled)
+    return tree.next_hops(settled), tree.distances
+
+
+# fills the result rows from begin on, one per source, the rows of different tasks never overlap
+def solve_rows(begin: int, sources: List[int]) -> int:
+    for row, source in enumerate(sources, begin):
+        next_hops, distances = solve_source(source)
+        worker_next_hops[row] = next_hops
+        worker_distances[row] = distances
+
+    return len(sources)
+
+
+def solve_block(sources: List[int]) -> Tuple[np.ndarray, np.ndarray]:
+    rows = [solve_source(source) for source in sources]
+    return np.array([row[0] for row in rows], dtype=np.int32), np.array([row[1] for row in rows], dtype=np.float64)
+
+
+def share_graph(shared: SharedArrays, graph: CsrGraph) -> None:
+    shared.copy(graph.indptr)
+    shared.copy(graph.indices)
+    shared.copy(graph.weights)
+
+
+# Shortest paths from every source (all nodes by default) on a pool of processes. The graph is placed in
+# shared memory once as csr arrays, every process maps it at start, and tasks carry only source ranges.
+# The processes write their rows straight into shared result matrices.
+def all_pairs(network: Network, workers: int = None, sources: List[int] = None, chunk_size: int = None) -> RoutingTables:
+    graph = csr_graph(network)
+    nodes_num = len(graph.indptr) - 1
+    sources = list(range(nodes_num)) if sources is None else list(sources)
+    workers = os.cpu_count() if workers is None else workers
+    # several chunks per process even out sources with large and small reachable parts
+    chunk_size = max(1, len(sources) // (8 * workers)) if chunk_size is None else chunk_size
+
+    with SharedArrays() as shared:
+        share_graph(shared, graph)
+        next_hops = shared.create((len(sources), nodes_num), np.int32)
+        distances = shared.create((len(sources), nodes_num), np.float64)
+
+        with ProcessPoolExecutor(workers, initializer=attach_worker, initargs=(shared.specs,)) as executor:
+            begins = range(0, len(sources), chunk_size)
+            list(executor.map(solve_rows, begins, [sources[begin:begin + chunk_size] for begin in begins]))
+
+        tables = RoutingTables(np.array(sources, dtype=np.int32), next_hops.copy(), distances.copy())
+        # a shared block can not be closed while arrays still view it
+        del next_hops, distances
+
+    return tables
+
+
+# all_pairs streamed into a routing table file (tables.RoutingTable) in router order. Only the blocks in flight
+# are held in memory, the pool runs ahead of the writer by at most 2 blocks per process.
+def write_all_pairs(network: Network, path: str, workers: int = None, block_size: int = 64) -> None:
+    graph = csr_graph(network)
+    nodes_num = len(graph.indptr) - 1
+    workers = os.cpu_count() if workers is None else workers
+
+    with SharedArrays() as shared, RoutingTableWriter(path, nodes_num) as writer:
+        share_graph(shared, graph)
+
+        with ProcessPoolExecutor(workers, initializer=attach_worker, initargs=(shared.specs,)) as executor:
+            blocks: Deque[Future] = deque()
+            for begin in range(0, nodes_num, block_size):
+                blocks.append(executor.submit(solve_block, list(range(begin, min(begin + block_size, nodes_num)))))
+                if len(blocks) >= 2 * workers:
+                    write_block(writer, blocks.popleft().result())
+
+            while len(blocks) > 0:
+                write_block(writer, blocks.popleft().result())
+
+
+def write_block(writer: RoutingTableWriter, block: Tuple[np.ndarray, np.ndarray]) -> None:
+    for next_hops, distances in zip(*block):
+        writer.write(next_hops, distances)
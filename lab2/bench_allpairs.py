@@ -0,0 +1,46 @@
+from typing import List
+from time import perf_counter
+from allpairs import all_pairs
+from generators import create_topology
+from network import Topology
+import os
+
+
+kNodesNum = 50000
+# all 50k sources take hours on one core and 30 GB of tables, a sample shows the per source rate
+kSourcesNum = 400
+
+
+def worker_counts() -> List[int]:
+    counts = [1]
+    while counts[-1] * 2 <= os.cpu_count():
+        counts.append(counts[-1] * 2)
+    if counts[-1] != os.cpu_count():
+        counts.append(os.cpu_count())
+    return counts
+
+
+def main(nodes_num: int = kNodesNum, sources_num: int = kSourcesNum):
+    network = create_topology(Topology.kRandomGeometric, nodes_num)
+    sources = list(range(0, nodes_num, nodes_num // sources_num))[:sources_num]
+
+    start_time = perf_counter()
+    for source in sources:
+        network.network_dijkstra(source)
+    serial_time = perf_counter() - start_time
+    print(f'serial network_dijkstra: {sources_num / serial_time:.1f} sources/s')
+
+    print('workers\ttime_s\tsources_per_s\tspeedup\tefficiency')
+    base_time = None
+    for workers in worker_counts():
+        start_time = perf_counter()
+        all_pairs(network, workers, sources)
+        work_time = perf_counter() - start_time
+        base_time = work_time if base_time is None else base_time
+
+        speedup = base_time / work_time
+        print(f'{workers}\t{work_time:.2f}\t{sources_num / work_time:.1f}\t{speedup:.2f}\t{speedup / workers:.2f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+from typing import List, Tuple
+from time import perf_counter
+from math import inf
+from network import Network, Topology
+from generators import create_topology
+import tracemalloc
+
+
+kSizes = [10, 100, 1000, 10000, 100000]
+# the linear scan with copied paths is quadratic, larger sizes take minutes
+kLegacyMaxSize = 2000
+
+
+# network_dijkstra before the binary heap: linear minimum search and a copied path per vertex
+def legacy_dijkstra(network: Network, start_node_idx: int) -> List[List[int]]:
+    nodes = list(network.nodes)
+    distances = [inf for _ in range(len(network.nodes))]
+    distances[start_node_idx] = 0
+    used = [False for _ in range(len(network.nodes))]
+    paths = [[] for _ in range(len(network.nodes))]
+    vertex_heap = [(start_node_idx, 0)]
+
+    while len(vertex_heap) > 0:
+        cur_min_idx = min(range(len(vertex_heap)), key=lambda i: vertex_heap[i][1])
+        cur_idx, _ = vertex_heap.pop(cur_min_idx)
+        if used[cur_idx]:
+            continue
+
+        used[cur_idx] = True
+        for neightbour in network.neightbours(cur_idx):
+            new_dist = distances[cur_idx] + nodes[neightbour].dist(nodes[cur_idx])
+            if new_dist < distances[neightbour]:
+                distances[neightbour] = new_dist
+                vertex_heap.append((neightbour, new_dist))
+                paths[neightbour] = paths[cur_idx] + [cur_idx]
+
+    return paths
+
+
+# time and peak traced memory come from separate runs, tracing slows python code down several times
+def measure(function) -> Tuple[float, float]:
+    start_time = perf_counter()
+    function()
+    work_time = perf_counter() - start_time
+
+    tracemalloc.start()
+    function()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return work_time, peak / 1e6
+
+
+def main(sizes: List[int] = kSizes):
+    print('nodes\tedges\theap_ms\theap_peak_mb\tlegacy_ms\tlegacy_peak_mb')
+    for nodes_num in sizes:
+        network = create_topology(Topology.kRandomGeometric, nodes_num)
+        edges_num = len(network.indices)
+
+        heap_time, heap_peak = measure(lambda: network.network_dijkstra(0))
+        legacy = '-\t-'
+        if nodes_num <= kLegacyMaxSize:
+            legacy_time, legacy_peak = measure(lambda: legacy_dijkstra(network, 0))
+            legacy = f'{legacy_time * 1e3:.2f}\t{legacy_peak:.2f}'
+
+        print(f'{nodes_num}\t{edges_num}\t{heap_time * 1e3:.2f}\t{heap_peak:.2f}\t{legacy}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,40 @@
+from typing import List
+from time import perf_counter
+from network import Network
+from generators import kMeanDegree
+import numpy as np
+
+
+kSizes = [1000, 10000, 100000, 1000000]
+# the all pairs comprehension build_graph used before the grid index
+kLegacyMaxSize = 4000
+
+
+def legacy_build_graph(network: Network) -> List[List[int]]:
+    nodes = list(network.nodes)
+    return [[i for i, n in enumerate(nodes) if node.dist(n) < network.radius] for node in nodes]
+
+
+def main(sizes: List[int] = kSizes):
+    print('nodes\tedges\tgrid_s\tlegacy_s')
+    for nodes_num in sizes:
+        side = (nodes_num * np.pi / kMeanDegree) ** 0.5
+        coords = np.random.default_rng(0).uniform(0.0, side, (nodes_num, 2))
+        network = Network.from_arrays(coords[:, 0], coords[:, 1], 1.0)
+
+        start_time = perf_counter()
+        network.build_graph()
+        grid_time = perf_counter() - start_time
+        edges_num = len(network.indices)
+
+        legacy = '-'
+        if nodes_num <= kLegacyMaxSize:
+            start_time = perf_counter()
+            assert legacy_build_graph(network) == [network.neightbours(i) for i in range(nodes_num)]
+            legacy = f'{perf_counter() - start_time:.3f}'
+
+        print(f'{nodes_num}\t{edges_num}\t{grid_time:.3f}\t{legacy}')
+
+
+if __name__ == '__main__':
+    main()
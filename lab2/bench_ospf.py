@@ -0,0 +1,58 @@
+from typing import List
+from time import perf_counter
+from network import Network, Topology
+from generators import create_topology
+from linkstate import LinkStateSimulator, OspfConfig
+import numpy as np
+
+
+# one 10^4 router run takes about 7 s of wall time on the grid, 15 s on random geometric and 18 s on scale-free,
+# the lsa flooding grows with the mean degree
+kSizes = [100, 1000, 10000]
+kTopologies = [Topology.kRandomGeometric, Topology.kScaleFree, Topology.kGrid]
+# route tables of every router are checked against a central dijkstra up to this size
+kVerifyMaxSize = 1000
+kFailureTime = 15.0
+
+
+# every live router's distances match a dijkstra on the network without the failed router
+def routes_match(simulator: LinkStateSimulator, network: Network, failed: int) -> bool:
+    network.remove_node(failed)
+    for router in simulator.routers:
+        if not router.alive:
+            continue
+
+        _, distances = simulator.spf(router) if router.routes is None else router.routes
+        expected = network.network_dijkstra(router.idx).distances
+        if any(a != b and abs(a - b) > 1e-9 for a, b in zip(distances, expected)):
+            return False
+
+    return True
+
+
+def main(sizes: List[int] = kSizes, config: OspfConfig = OspfConfig()):
+    print('topology\trouters\tfailed_degree\tdetection_s\tconvergence_s\tlsas_originated\tlsa_messages\tack_messages\thello_messages\t'
+          'retransmissions\tspf_runs_mean\tspf_runs_max\tlsas_received_mean\twall_s\troutes_ok')
+    for nodes_num in sizes:
+        for topology in kTopologies:
+            network = create_topology(topology, nodes_num)
+            # a router of median degree fails, a scale-free hub of 10^4 routers floods thousands of lsas
+            # over every link and takes hours of wall time
+            failed = int(np.argsort(network.degrees(), kind='stable')[nodes_num // 2])
+
+            start_time = perf_counter()
+            simulator = LinkStateSimulator(network, config, compute_routes=nodes_num <= kVerifyMaxSize)
+            simulator.fail_router(failed, kFailureTime)
+            simulator.run(kFailureTime + 2.0 * config.dead_interval + config.spf_max_wait)
+            work_time = perf_counter() - start_time
+
+            report = simulator.report()
+            routes_ok = routes_match(simulator, network, failed) if nodes_num <= kVerifyMaxSize else '-'
+            print(f'{Topology.to_str(topology)}\t{nodes_num}\t{len(simulator.routers[failed].links)}\t'
+                  f'{report.detection_time:.3f}\t{report.convergence_time:.3f}\t{report.lsas_originated}\t{report.lsa_messages}\t{report.ack_messages}\t{report.hello_messages}\t'
+                  f'{report.retransmissions}\t{report.spf_runs.mean():.2f}\t{report.spf_runs.max()}\t'
+                  f'{report.lsas_received.mean():.1f}\t{work_time:.2f}\t{routes_ok}', flush=True)
+
+
+if __name__ == '__main__':
+    main()
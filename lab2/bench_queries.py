@@ -0,0 +1,60 @@
+from typing import List, Tuple
+from time import perf_counter
+from network import Topology, TreeCache
+from generators import create_topology
+import numpy as np
+
+
+kNodesNum = 10000
+kQueriesNum = 2000
+# queries between topology changes
+kChangeEvery = [500, 2000]
+# source popularity falls as rank^-kZipfExponent, a few routers are asked about most of the time
+kZipfExponent = 1.3
+kCacheSizes = [2 ** 20, 16 * 2 ** 20, 64 * 2 ** 20]
+
+
+def make_queries(nodes_num: int, queries_num: int, seed: int) -> List[Tuple[int, int]]:
+    rng = np.random.default_rng(seed)
+    popularity = 1.0 / np.arange(1, nodes_num + 1) ** kZipfExponent
+    sources = rng.permutation(nodes_num)[rng.choice(nodes_num, queries_num, p=popularity / popularity.sum())]
+    return list(zip(sources.tolist(), rng.integers(0, nodes_num, queries_num).tolist()))
+
+
+def run(queries: List[Tuple[int, int]], change_every: int, cache_size: int, seed: int) -> None:
+    network = create_topology(Topology.kRandomGeometric, kNodesNum, seed=seed)
+    network.tree_cache = TreeCache(cache_size)
+    failures = np.random.default_rng(seed).integers(0, kNodesNum, len(queries) // change_every + 1).tolist()
+
+    uncached_time = 0.0
+    cached_time = 0.0
+    for i, (source, destination) in enumerate(queries):
+        if i > 0 and i % change_every == 0:
+            network.remove_node(failures[i // change_every])
+
+        start_time = perf_counter()
+        expected = network.network_dijkstra(source).path(destination)
+        uncached_time += perf_counter() - start_time
+
+        start_time = perf_counter()
+        path = network.path(source, destination)
+        cached_time += perf_counter() - start_time
+        assert path == expected
+
+    stats = network.tree_cache.stats()
+    print(f'{change_every}\t{cache_size / 2 ** 20:.0f}\t{uncached_time / len(queries) * 1e3:.3f}\t'
+          f'{cached_time / len(queries) * 1e3:.3f}\t{stats.hit_rate():.3f}\t{stats.invalidations}\t{stats.evictions}\t'
+          f'{stats.trees}\t{stats.bytes / 2 ** 20:.2f}')
+
+
+def main(seed: int = 0):
+    queries = make_queries(kNodesNum, kQueriesNum, seed)
+    print(f'{kNodesNum} nodes, {kQueriesNum} queries, {len(set(source for source, _ in queries))} distinct sources')
+    print('change_every\tcache_mb\tuncached_ms\tcached_ms\thit_rate\tinvalidations\tevictions\ttrees\tcache_used_mb')
+    for change_every in kChangeEvery:
+        for cache_size in kCacheSizes:
+            run(queries, change_every, cache_size, seed)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+from typing import Dict, List
+from time import perf_counter
+from network import OutputFormat, Topology
+from generators import generate
+from spf import IncrementalSpf
+import argparse
+import platform
+import json
+import sys
+import os
+
+
+kSizes = [1000, 10000, 100000, 1000000]
+kMaxSize = 100000
+# mean degrees of the topologies with a density parameter, the others have a fixed structure
+kMeanDegrees = [4.0, 8.0, 16.0]
+kFixedTopologies = [Topology.kLine, Topology.kRing, Topology.kStar, Topology.kGrid]
+kDensityTopologies = [Topology.kRandomGeometric, Topology.kWaxman, Topology.kScaleFree]
+# all pairs work grows as n^2 log n, larger sizes are skipped
+kAllPairsMaxSize = 1000
+kColumns = ['topology', 'nodes', 'mean_degree', 'edges', 'generate_s', 'build_graph_s', 'dijkstra_s', 'ospf_s', 'recovery_s']
+
+
+def timed(function) -> float:
+    start_time = perf_counter()
+    function()
+    return perf_counter() - start_time
+
+
+def run_case(topology: Topology, nodes_num: int, mean_degree: float, seed: int) -> Dict:
+    start_time = perf_counter()
+    generated = generate(topology, nodes_num, mean_degree, seed)
+    generate_time = perf_counter() - start_time
+
+    start_time = perf_counter()
+    network = generated.to_network()
+    build_time = perf_counter() - start_time
+
+    if topology == Topology.kRing and nodes_num >= 4:
+        # two links per node, the node itself counts in radius graphs
+        assert (network.degrees() == 3).all()
+
+    result = {
+        'topology': Topology.to_str(topology),
+        'nodes': nodes_num,
+        'mean_degree': mean_degree if topology in kDensityTopologies else None,
+        # the node itself counts in radius graphs
+        'edges': len(network.indices),
+        'generate_s': generate_time,
+        'build_graph_s': build_time,
+        'dijkstra_s': timed(lambda: network.network_dijkstra(nodes_num // 2)),
+        'ospf_s': None,
+        'recovery_s': None,
+    }
+
+    if nodes_num <= kAllPairsMaxSize:
+        os.makedirs('results', exist_ok=True)
+        result['ospf_s'] = timed(lambda: network.ospf('bench_routing', output_format=OutputFormat.kBinary))
+        os.remove('results/bench_routing.rtbl')
+
+        # failure of the middle node, every source tree repaired in place
+        spf = IncrementalSpf(network)
+        result['recovery_s'] = timed(lambda: spf.remove_node(nodes_num // 2))
+
+    return result
+
+
+def format_value(value) -> str:
+    if value is None:
+        return '-'
+    return f'{value:.4f}' if isinstance(value, float) else str(value)
+
+
+def main(args: List[str]) -> int:
+    parser = argparse.ArgumentParser(description='lab2 routing scaling benchmark')
+    parser.add_argument('--max-size', type=int, default=kMaxSize, help=f'largest topology, up to {kSizes[-1]} nodes')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='write the results as json')
+    options = parser.parse_args(args)
+
+    cases = [(topology, None) for topology in kFixedTopologies]
+    cases += [(topology, mean_degree) for topology in kDensityTopologies for mean_degree in kMeanDegrees]
+
+    results = []
+    print('\t'.join(kColumns))
+    for nodes_num in [size for size in kSizes if size <= options.max_size]:
+        for topology, mean_degree in cases:
+            result = run_case(topology, nodes_num, 8.0 if mean_degree is None else mean_degree, options.seed)
+            results.append(result)
+            print('\t'.join(format_value(result[column]) for column in kColumns), flush=True)
+
+    if options.output is not None:
+        with open(options.output, 'w') as file:
+            json.dump({'python': platform.python_version(), 'machine': platform.machine(), 'seed': options.seed,
+                       'results': results}, file, indent=2)
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,85 @@
+from typing import List
+from time import perf_counter
+from math import inf
+from network import Network, Point, Topology
+from spf import IncrementalSpf
+from generators import create_topology
+import numpy as np
+
+
+kSizes = [250, 500, 1000]
+kFailures = 10
+kInsertions = 5
+kCostChanges = 10
+
+
+def full_recompute(network: Network) -> List[List[float]]:
+    return [network.network_dijkstra(i).distances for i in range(len(network.xs))]
+
+
+# distances of the maintained trees against a recompute from scratch, the cost is the full recompute time
+def check(spf: IncrementalSpf) -> float:
+    start_time = perf_counter()
+    expected = full_recompute(spf.network)
+    work_time = perf_counter() - start_time
+
+    for tree, distances in zip(spf.trees, expected):
+        assert all(a == b or abs(a - b) < 1e-9 for a, b in zip(tree.distances, distances))
+    return work_time
+
+
+# a link of a removed node must not come back with a finite cost
+def check_removed_link(spf: IncrementalSpf, node_idx: int) -> None:
+    indptr, indices, _ = spf.network.csr_lists()
+    neightbour = next(i for i in indices[indptr[node_idx]:indptr[node_idx + 1]] if i != node_idx)
+    try:
+        spf.set_link_cost(neightbour, node_idx, 1.0)
+    except AssertionError:
+        return
+
+    assert False, f'link {neightbour} - {node_idx} of a removed node got a cost'
+
+
+def run_events(name: str, spf: IncrementalSpf, events) -> None:
+    reachable = sum(1 for tree in spf.trees for distance in tree.distances if distance < inf)
+    incremental_time = 0.0
+    full_time = 0.0
+    touched_nodes = 0
+
+    for event in events:
+        spf.touched_nodes = 0
+        start_time = perf_counter()
+        event()
+        incremental_time += perf_counter() - start_time
+        touched_nodes += spf.touched_nodes
+        full_time += check(spf)
+
+    events_num = len(events)
+    print(f'{len(spf.network.nodes)}\t{name}\t{incremental_time / events_num * 1e3:.2f}\t{full_time / events_num * 1e3:.2f}\t'
+          f'{full_time / incremental_time:.1f}\t{touched_nodes / events_num:.0f}\t{reachable}')
+
+
+def main(sizes: List[int] = kSizes, seed: int = 0):
+    print('nodes\tevent\tincremental_ms\tfull_ms\tspeedup\ttouched_nodes\treachable_pairs')
+    for nodes_num in sizes:
+        rng = np.random.default_rng(seed)
+        network = create_topology(Topology.kRandomGeometric, nodes_num, seed=seed)
+        spf = IncrementalSpf(network)
+        side = max(network.xs.max(), network.ys.max())
+
+        failed = rng.choice(nodes_num, kFailures, replace=False).tolist()
+        run_events('failure', spf, [lambda i=i: spf.remove_node(i) for i in failed])
+        check_removed_link(spf, failed[0])
+
+        points = [Point(float(x), float(y)) for x, y in rng.uniform(0.0, side, (kInsertions, 2))]
+        run_events('insertion', spf, [lambda p=p: spf.add_node(p) for p in points])
+
+        # links between alive nodes, every one made cheaper and then more expensive than before
+        links = [(u, v) for u in rng.choice(nodes_num, 4 * kCostChanges).tolist() for v in network.neightbours(u)
+                 if u < v and network.get_link_cost(u, v) < inf][:kCostChanges]
+        run_events('cheaper-link', spf, [lambda u=u, v=v: spf.set_link_cost(u, v, network.get_link_cost(u, v) / 2) for u, v in links])
+        run_events('costlier-link', spf, [lambda u=u, v=v: spf.set_link_cost(u, v, network.get_link_cost(u, v) * 4) for u, v in links])
+
+
+if __name__ == '__main__':
+    main()
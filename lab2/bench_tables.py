@@ -0,0 +1,28 @@
+from typing import List
+from time import perf_counter
+from network import OutputFormat, Topology
+from generators import create_topology
+import os
+
+
+kSizes = [100, 250, 500, 1000]
+
+
+def main(sizes: List[int] = kSizes):
+    os.makedirs('results', exist_ok=True)
+    print('nodes\tformat\ttime_ms\tsize_mb')
+    for nodes_num in sizes:
+        network = create_topology(Topology.kRandomGeometric, nodes_num)
+        for output_format, extension in [(OutputFormat.kText, 'txt'), (OutputFormat.kBinary, 'rtbl')]:
+            title = f'bench_tables_{nodes_num}'
+            start_time = perf_counter()
+            network.ospf(title, output_format=output_format)
+            work_time = perf_counter() - start_time
+
+            path = f'results/{title}.{extension}'
+            print(f'{nodes_num}\t{OutputFormat.to_str(output_format)}\t{work_time * 1e3:.1f}\t{os.path.getsize(path) / 1e6:.2f}')
+            os.remove(path)
+
+
+if __name__ == '__main__':
+    main()
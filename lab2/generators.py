@@ -0,0 +1,144 @@
+from __future__ import annotations
+from typing import NamedTuple
+from network import Network, Topology, close_pairs
+import numpy as np
+
+
+kMeanDegree = 8.0
+# Waxman link probability scale, beta * exp(-d / scale)
+kWaxmanBeta = 0.4
+# Waxman pairs are drawn among the pairs whose link probability is above beta * kWaxmanCutoff, about 2% of
+# the links fall beyond and are never drawn
+kWaxmanCutoff = 1e-3
+kWaxmanChunkSize = 20000
+# ring link radius, above the unit side and below the sqrt(2) diagonal of the 4 node ring
+kRingRadius = 1.2
+
+
+# Node coordinates and either a connection radius (links to every node closer than it) or an explicit
+# undirected edge list (sources[k] - targets[k]).
+class GeneratedTopology(NamedTuple):
+    xs: np.ndarray
+    ys: np.ndarray
+    radius: float
+    sources: np.ndarray = None
+    targets: np.ndarray = None
+
+    def to_network(self) -> Network:
+        network = Network.from_arrays(self.xs, self.ys, self.radius)
+        if self.sources is None:
+            network.build_graph()
+            return network
+
+        sources = np.concatenate((self.sources, self.targets))
+        targets = np.concatenate((self.targets, self.sources))
+        network.set_edges(sources, targets, np.hypot(self.xs[sources] - self.xs[targets], self.ys[sources] - self.ys[targets]))
+        return network
+
+
+# nodes a unit apart on a straight line, each linked to the previous and the next one
+def line(nodes_num: int) -> GeneratedTopology:
+    return GeneratedTopology(np.arange(nodes_num, dtype=np.float64), np.zeros(nodes_num), 1.5)
+
+
+# nodes a unit apart on a circle, each linked to the previous and the next one
+def ring(nodes_num: int) -> GeneratedTopology:
+    angles = np.arange(nodes_num) * (2.0 * np.pi / nodes_num)
+    circle_radius = 0.5 / np.sin(np.pi / nodes_num) if nodes_num > 1 else 0.0
+    return GeneratedTopology(circle_radius * np.cos(angles), circle_radius * np.sin(angles), kRingRadius)
+
+
+# node 0 in the middle, linked to every other node on the unit circle
+def star(nodes_num: int) -> GeneratedTopology:
+    angles = np.arange(nodes_num - 1) * (2.0 * np.pi / max(1, nodes_num - 1))
+    xs = np.concatenate(([0.0], np.cos(angles)))
+    ys = np.concatenate(([0.0], np.sin(angles)))
+    leaves = np.arange(1, nodes_num, dtype=np.int64)
+    return GeneratedTopology(xs, ys, 0.0, np.zeros(nodes_num - 1, dtype=np.int64), leaves)
+
+
+# square lattice filled row by row, each node linked to its 4 closest nodes
+def grid(nodes_num: int) -> GeneratedTopology:
+    side = int(np.ceil(nodes_num ** 0.5))
+    indices = np.arange(nodes_num)
+    return GeneratedTopology((indices % side).astype(np.float64), (indices // side).astype(np.float64), 1.1)
+
+
+# uniform points at a density that gives every node about mean_degree neighbours within radius 1
+def random_geometric(nodes_num: int, mean_degree: float = kMeanDegree, seed: int = 0) -> GeneratedTopology:
+    side = (nodes_num * np.pi / mean_degree) ** 0.5
+    coords = np.random.default_rng(seed).uniform(0.0, side, (nodes_num, 2))
+    return GeneratedTopology(coords[:, 0], coords[:, 1], 1.0)
+
+
+# Waxman: uniform points with unit density, a pair at distance d is linked with probability beta * exp(-d / scale).
+# With unit density a node expects 2 pi beta scale^2 links, so the scale follows from mean_degree. The pairs are
+# drawn only among those the grid finds within the cutoff distance, so memory and time stay linear in nodes.
+def waxman(nodes_num: int, mean_degree: float = kMeanDegree, seed: int = 0, beta: float = kWaxmanBeta) -> GeneratedTopology:
+    rng = np.random.default_rng(seed)
+    side = nodes_num ** 0.5
+    xs, ys = rng.uniform(0.0, side, (2, nodes_num))
+    scale = (mean_degree / (2.0 * np.pi * beta)) ** 0.5
+    cutoff = scale * np.log(1.0 / kWaxmanCutoff)
+
+    sources = []
+    targets = []
+    for pair_sources, pair_targets, lengths in close_pairs(xs, ys, cutoff, kWaxmanChunkSize, unordered=True):
+        linked = rng.random(len(lengths)) < beta * np.exp(-lengths / scale)
+        sources.append(pair_sources[linked])
+        targets.append(pair_targets[linked])
+
+    return GeneratedTopology(xs, ys, 0.0, np.concatenate(sources), np.concatenate(targets))
+
+
+# Barabasi-Albert preferential attachment through the Batagelj-Brandes edge list: every new node links to
+# mean_degree / 2 ends of uniformly chosen earlier edges, which picks nodes in proportion to their degree.
+# Position 0 of the end list is node 0, edge e puts its source at 2e + 1 and its target at 2e + 2. A target that
+# copies another target is resolved by pointer jumping, vectorized over all edges. Self loops and repeated
+# links are dropped. The coordinates are uniform and only give the links their lengths.
+def scale_free(nodes_num: int, mean_degree: float = kMeanDegree, seed: int = 0) -> GeneratedTopology:
+    rng = np.random.default_rng(seed)
+    side = nodes_num ** 0.5
+    xs, ys = rng.uniform(0.0, side, (2, nodes_num))
+
+    links_per_node = max(1, int(round(mean_degree / 2.0)))
+    edges_num = (nodes_num - 1) * links_per_node
+    edge_sources = np.arange(edges_num, dtype=np.int64) // links_per_node + 1
+    # any end list position before the edge's own source
+    choices = (rng.random(edges_num) * (2 * np.arange(edges_num, dtype=np.int64) + 1)).astype(np.int64)
+
+    positions = choices.copy()
+    pending = np.flatnonzero((positions > 0) & (positions % 2 == 0))
+    while len(pending) > 0:
+        positions[pending] = choices[(positions[pending] - 2) // 2]
+        pending = pending[(positions[pending] > 0) & (positions[pending] % 2 == 0)]
+
+    edge_targets = np.where(positions == 0, 0, (positions - 1) // 2 // links_per_node + 1)
+
+    keys = np.unique(np.minimum(edge_sources, edge_targets) * nodes_num + np.maximum(edge_sources, edge_targets))
+    sources, targets = keys // nodes_num, keys % nodes_num
+    distinct = sources != targets
+    return GeneratedTopology(xs, ys, 0.0, sources[distinct], targets[distinct])
+
+
+def generate(topology: Topology, nodes_num: int, mean_degree: float = kMeanDegree, seed: int = 0) -> GeneratedTopology:
+    if topology == Topology.kLine:
+        return line(nodes_num)
+    elif topology == Topology.kRing:
+        return ring(nodes_num)
+    elif topology == Topology.kStar:
+        return star(nodes_num)
+    elif topology == Topology.kGrid:
+        return grid(nodes_num)
+    elif topology == Topology.kRandomGeometric:
+        return random_geometric(nodes_num, mean_degree, seed)
+    elif topology == Topology.kWaxman:
+        return waxman(nodes_num, mean_degree, seed)
+    elif topology == Topology.kScaleFree:
+        return scale_free(nodes_num, mean_degree, seed)
+
+    assert False, f'unknown topology {topology}'
+
+
+def create_topology(topology: Topology, nodes_num: int, mean_degree: float = kMeanDegree, seed: int = 0) -> Network:
+    return generate(topology, nodes_num, mean_degree, seed).to_network()
@@ -0,0 +1,334 @@
+from __future__ import annotations
+from typing import Callable, Dict, FrozenSet, List, NamedTuple, Set, Tuple
+from math import inf
+from network import Network
+import numpy as np
+import heapq
+
+
+class OspfConfig(NamedTuple):
+    hello_interval: float = 10.0
+    dead_interval: float = 40.0
+    retransmit_interval: float = 5.0
+    # spf throttle: the first run waits spf_initial_delay, back to back runs wait a hold time that doubles
+    # up to spf_max_wait and falls back to spf_hold after a quiet hold time
+    spf_initial_delay: float = 0.05
+    spf_hold: float = 0.2
+    spf_max_wait: float = 5.0
+    # time a router spends on one spf run: its routes are installed when the run completes and the next
+    # run cannot start before that
+    spf_duration: float = 0.0
+    # link delay is link_delay + length * delay_per_unit
+    link_delay: float = 0.0005
+    delay_per_unit: float = 0.001
+
+
+# A router's link state advertisement: its live neighbours and link costs, newer sequence numbers win.
+class Lsa:
+    __slots__ = ('origin', 'seq', 'links', 'neightbours')
+
+    def __init__(self, origin: int, seq: int, links: Tuple[Tuple[int, float], ...]) -> None:
+        self.origin = origin
+        self.seq = seq
+        self.links = links
+        self.neightbours: FrozenSet[int] = frozenset(neightbour for neightbour, _ in links)
+
+
+class Router:
+    __slots__ = (
+        'idx', 'alive', 'links', 'last_hello', 'lsdb', 'retransmit', 'retransmit_timers', 'spf_pending', 'spf_hold',
+        'last_spf_time', 'spf_busy_until', 'routes', 'spf_runs', 'lsas_sent', 'lsas_received', 'acks_sent', 'hellos_sent',
+    )
+
+    def __init__(self, idx: int, links: Dict[int, Tuple[float, float]]) -> None:
+        self.idx = idx
+        self.alive = True
+        # neighbour -> (cost, delay) of the adjacencies that are up
+        self.links = links
+        self.last_hello: Dict[int, float] = {neightbour: 0.0 for neightbour in links}
+        # lsas newer than the converged start state, the rest are read from the shared start lsdb
+        self.lsdb: Dict[int, Lsa] = {}
+        # neighbour -> origin -> lsa sent and not acknowledged yet with its send time
+        self.retransmit: Dict[int, Dict[int, Tuple[Lsa, float]]] = {}
+        # neighbours with a retransmission timer running, one per adjacency as in OSPF
+        self.retransmit_timers: Set[int] = set()
+        self.spf_pending = False
+        self.spf_hold = 0.0
+        self.last_spf_time = -inf
+        self.spf_busy_until = -inf
+        self.routes: Tuple[List[int], List[float]] = None
+        self.spf_runs = 0
+        self.lsas_sent = 0
+        self.lsas_received = 0
+        self.acks_sent = 0
+        self.hellos_sent = 0
+
+
+class ConvergenceReport(NamedTuple):
+    failure_time: float
+    # from the failure to the first dead interval expiry at a neighbour
+    detection_time: float
+    # from the failure to the last spf run completed anywhere
+    convergence_time: float
+    lsas_originated: int
+    lsa_messages: int
+    ack_messages: int
+    hello_messages: int
+    retransmissions: int
+    spf_runs: np.ndarray
+    lsas_received: np.ndarray
+
+
+# Per router OSPF link state routing on a virtual clock. Routers exchange hellos to keep adjacencies up, declare a
+# neighbour dead after the dead interval without hellos, then originate a new router LSA and flood it reliably:
+# every LS update is acknowledged and retransmitted until it is. Each router runs throttled SPF on its own LSDB,
+# a link counts only when both of its ends advertise it.
+# The simulation starts converged: every LSDB holds the current router LSAs, shared until a router installs a newer one,
+# so memory stays linear in routers and links for topologies of 10^4 routers. Route tables are computed only
+# with compute_routes, otherwise SPF runs are counted and take config.spf_duration of virtual time.
+# Events are (time, counter, callback, args) on a heap: they carry their arguments instead of a closure and are
+# never cancelled, a stale timer finds the state moved on when it fires. Hellos are not events, a router
+# stamps their arrival time on its neighbours when it sends them.
+class LinkStateSimulator:
+    def __init__(self, network: Network, config: OspfConfig = OspfConfig(), seed: int = 0, compute_routes: bool = False) -> None:
+        network.build_graph()
+        self.config = config
+        self.compute_routes = compute_routes
+        self.current_time = 0.0
+        self.events: List[Tuple[float, int, Callable, Tuple]] = []
+        self.event_counter = 0
+        self.rng = np.random.default_rng(seed)
+
+        self.routers: List[Router] = []
+        self.start_lsdb: List[Lsa] = []
+        indptr, indices, weights = network.csr_lists()
+        for i in range(len(network.xs)):
+            links = {indices[k]: (weights[k], config.link_delay + weights[k] * config.delay_per_unit)
+                     for k in range(indptr[i], indptr[i + 1]) if indices[k] != i and weights[k] < inf}
+            self.routers.append(Router(i, links))
+            self.start_lsdb.append(Lsa(i, 1, tuple((j, cost) for j, (cost, _) in links.items())))
+
+        self.failure_time: float = None
+        self.first_detection: float = None
+        self.last_spf_done: float = None
+        self.lsas_originated = 0
+        self.retransmissions = 0
+
+        # hellos start at random phases, every adjacency has just heard its neighbour
+        for router in self.routers:
+            self.schedule(self.rng.uniform(0.0, config.hello_interval), self.send_hellos, (router,))
+            for neightbour in router.links:
+                self.schedule_dead_check(router, neightbour)
+
+    def lsa(self, router: Router, origin: int) -> Lsa:
+        lsa = router.lsdb.get(origin)
+        return self.start_lsdb[origin] if lsa is None else lsa
+
+    def schedule(self, delay: float, callback: Callable, args: Tuple) -> None:
+        # the counter breaks fire time ties in scheduling order
+        heapq.heappush(self.events, (self.current_time + delay, self.event_counter, callback, args))
+        self.event_counter += 1
+
+    def fail_router(self, router_idx: int, delay: float = 0.0) -> None:
+        self.schedule(delay, self.on_failure, (router_idx,))
+
+    def on_failure(self, router_idx: int) -> None:
+        self.failure_time = self.current_time
+        self.routers[router_idx].alive = False
+
+    def run(self, until: float) -> None:
+        events = self.events
+        while len(events) > 0 and events[0][0] <= until:
+            fire_time, _, callback, args = heapq.heappop(events)
+            self.current_time = fire_time
+            callback(*args)
+
+        self.current_time = until
+
+    def send(self, router: Router, neightbour: int, callback: Callable, args: Tuple) -> None:
+        self.schedule(router.links[neightbour][1], callback, (self.routers[neightbour], router.idx) + args)
+
+    # hello
+
+    # a hello only moves the neighbour's last hello time, it is written at once with the time it arrives at
+    def send_hellos(self, router: Router) -> None:
+        if not router.alive:
+            return
+
+        for neightbour, (_, delay) in router.links.items():
+            peer = self.routers[neightbour]
+            if peer.alive and router.idx in peer.links:
+                peer.last_hello[router.idx] = self.current_time + delay
+        router.hellos_sent += len(router.links)
+        self.schedule(self.config.hello_interval, self.send_hellos, (router,))
+
+    def schedule_dead_check(self, router: Router, neightbour: int) -> None:
+        delay = router.last_hello[neightbour] + self.config.dead_interval - self.current_time
+        self.schedule(max(0.0, delay), self.on_dead_check, (router, neightbour))
+
+    # one pending check per adjacency, moved forward by the hellos heard since it was scheduled
+    def on_dead_check(self, router: Router, neightbour: int) -> None:
+        if not router.alive or neightbour not in router.links:
+            return
+
+        if self.current_time - router.last_hello[neightbour] < self.config.dead_interval:
+            self.schedule_dead_check(router, neightbour)
+            return
+
+        if self.first_detection is None:
+            self.first_detection = self.current_time
+
+        del router.links[neightbour]
+        router.retransmit.pop(neightbour, None)
+        self.originate(router)
+
+    # flooding
+
+    def originate(self, router: Router) -> None:
+        lsa = Lsa(router.idx, self.lsa(router, router.idx).seq + 1, tuple((j, cost) for j, (cost, _) in router.links.items()))
+        router.lsdb[router.idx] = lsa
+        self.lsas_originated += 1
+        self.flood(router, lsa, -1)
+        self.schedule_spf(router)
+
+    def flood(self, router: Router, lsa: Lsa, received_from: int) -> None:
+        for neightbour in router.links:
+            if neightbour != received_from:
+                self.send_lsa(router, neightbour, lsa)
+
+    def send_lsa(self, router: Router, neightbour: int, lsa: Lsa) -> None:
+        router.retransmit.setdefault(neightbour, {})[lsa.origin] = (lsa, self.current_time)
+        router.lsas_sent += 1
+        self.send(router, neightbour, self.on_ls_update, (lsa,))
+        if neightbour not in router.retransmit_timers:
+            router.retransmit_timers.add(neightbour)
+            self.schedule(self.config.retransmit_interval, self.on_retransmit_timer, (router, neightbour))
+
+    def is_unacked(self, router: Router, neightbour: int, origin: int, seq: int) -> bool:
+        entry = router.retransmit.get(neightbour, {}).get(origin)
+        return entry is not None and entry[0].seq == seq
+
+    def acknowledged(self, router: Router, neightbour: int, origin: int) -> None:
+        router.retransmit.get(neightbour, {}).pop(origin, None)
+
+    # resends the lsas unacknowledged for a retransmit interval, the timer runs again while any are left
+    def on_retransmit_timer(self, router: Router, neightbour: int) -> None:
+        pending = router.retransmit.get(neightbour)
+        if not router.alive or not pending:
+            router.retransmit_timers.discard(neightbour)
+            return
+
+        # the timer stays registered, the resends do not start another one
+        due_time = self.current_time - self.config.retransmit_interval
+        for lsa, send_time in list(pending.values()):
+            if send_time <= due_time:
+                self.retransmissions += 1
+                self.send_lsa(router, neightbour, lsa)
+
+        first_send_time = min(send_time for _, send_time in pending.values())
+        self.schedule(first_send_time + self.config.retransmit_interval - self.current_time, self.on_retransmit_timer, (router, neightbour))
+
+    def on_ls_update(self, router: Router, neightbour: int, lsa: Lsa) -> None:
+        if not router.alive or neightbour not in router.links:
+            return
+
+        router.lsas_received += 1
+        current = self.lsa(router, lsa.origin)
+        if lsa.seq > current.seq:
+            router.lsdb[lsa.origin] = lsa
+            # the sender has it, no need to keep sending it the older copy
+            self.acknowledged(router, neightbour, lsa.origin)
+            self.send_ack(router, neightbour, lsa)
+            self.flood(router, lsa, neightbour)
+            self.schedule_spf(router)
+        elif lsa.seq == current.seq:
+            # a duplicate acknowledges our own copy, when we had sent one
+            if self.is_unacked(router, neightbour, lsa.origin, lsa.seq):
+                self.acknowledged(router, neightbour, lsa.origin)
+            else:
+                self.send_ack(router, neightbour, lsa)
+        else:
+            self.send_lsa(router, neightbour, current)
+
+    def send_ack(self, router: Router, neightbour: int, lsa: Lsa) -> None:
+        router.acks_sent += 1
+        self.send(router, neightbour, self.on_ls_ack, (lsa.origin, lsa.seq))
+
+    def on_ls_ack(self, router: Router, neightbour: int, origin: int, seq: int) -> None:
+        if router.alive and self.is_unacked(router, neightbour, origin, seq):
+            self.acknowledged(router, neightbour, origin)
+
+    # spf
+
+    def schedule_spf(self, router: Router) -> None:
+        if router.spf_pending:
+            return
+
+        router.spf_pending = True
+        now = self.current_time
+        if now - router.last_spf_time > router.spf_hold:
+            # quiet since the last run: start over from the initial delay and the base hold time
+            router.spf_hold = self.config.spf_hold
+            delay = self.config.spf_initial_delay
+        else:
+            delay = max(self.config.spf_initial_delay, router.last_spf_time + router.spf_hold - now)
+            router.spf_hold = min(2.0 * router.spf_hold, self.config.spf_max_wait)
+
+        # a run still in progress finishes first
+        self.schedule(max(delay, router.spf_busy_until - now), self.run_spf, (router,))
+
+    # the run works on the lsdb as it is when the run starts, its routes replace the old ones spf_duration later
+    def run_spf(self, router: Router) -> None:
+        router.spf_pending = False
+        if not router.alive:
+            return
+
+        router.spf_runs += 1
+        router.last_spf_time = self.current_time
+        router.spf_busy_until = self.current_time + self.config.spf_duration
+        routes = self.spf(router) if self.compute_routes else None
+        self.schedule(self.config.spf_duration, self.on_spf_done, (router, routes))
+
+    def on_spf_done(self, router: Router, routes: Tuple[List[int], List[float]]) -> None:
+        if not router.alive:
+            return
+
+        self.last_spf_done = self.current_time
+        if routes is not None:
+            router.routes = routes
+
+    # dijkstra over the router's own lsdb, returns next hops and distances
+    def spf(self, router: Router) -> Tuple[List[int], List[float]]:
+        distances = [inf for _ in range(len(self.routers))]
+        distances[router.idx] = 0.0
+        next_hops = [-1 for _ in range(len(self.routers))]
+        next_hops[router.idx] = router.idx
+        used = [False for _ in range(len(self.routers))]
+
+        vertex_heap = [(0.0, 0, router.idx)]
+        push_counter = 1
+        while len(vertex_heap) > 0:
+            cur_dist, _, cur_idx = heapq.heappop(vertex_heap)
+            if used[cur_idx]:
+                continue
+
+            used[cur_idx] = True
+            for neightbour, cost in self.lsa(router, cur_idx).links:
+                new_dist = cur_dist + cost
+                if new_dist < distances[neightbour] and cur_idx in self.lsa(router, neightbour).neightbours:
+                    distances[neightbour] = new_dist
+                    next_hops[neightbour] = neightbour if cur_idx == router.idx else next_hops[cur_idx]
+                    heapq.heappush(vertex_heap, (new_dist, push_counter, neightbour))
+                    push_counter += 1
+
+        return next_hops, distances
+
+    def report(self) -> ConvergenceReport:
+        alive = [router for router in self.routers if router.alive]
+        detection_time = inf if self.first_detection is None else self.first_detection - self.failure_time
+        convergence_time = inf if self.last_spf_done is None else self.last_spf_done - self.failure_time
+        return ConvergenceReport(
+            self.failure_time, detection_time, convergence_time, self.lsas_originated,
+            sum(router.lsas_sent for router in self.routers), sum(router.acks_sent for router in self.routers),
+            sum(router.hellos_sent for router in self.routers), self.retransmissions,
+            np.array([router.spf_runs for router in alive]), np.array([router.lsas_received for router in alive]))
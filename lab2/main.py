@@ -1,6 +1,7 @@
 from typing import List
-from network import Network, Point, Topology
+from network import Network, OutputFormat, Point, Topology
 from plotter import Plotter
+from spf import IncrementalSpf
 
 
 def main():
@@ -13,11 +14,12 @@ def main():
     line_topology_network.build_graph()
     plt.plot_points(line_topology_network.nodes, True, 'full_line_points')
     plt.plot_network_grapth(line_topology_network, 'full_line')
-    line_topology_network.ospf('line_full')
+    line_spf = IncrementalSpf(line_topology_network)
+    line_topology_network.ospf('line_full', line_spf.trees, OutputFormat.kText)
 
-    line_topology_network.remove_node(3)
+    line_spf.remove_node(3)
     plt.plot_network_grapth(line_topology_network, 'rm_line')
-    line_topology_network.ospf('line_remove')
+    line_topology_network.ospf('line_remove', line_spf.trees, OutputFormat.kText)
 
     def ring_points(r: float) -> List[Point]:
         xs = [-3.0, -2.7, -2.0, -1.0]
@@ -41,22 +43,24 @@ def main():
         connection_radius=1.7
     )
     ring_topology_network.build_graph()
-    ring_topology_network.ospf('ring_full')
+    ring_spf = IncrementalSpf(ring_topology_network)
+    ring_topology_network.ospf('ring_full', ring_spf.trees, OutputFormat.kText)
     plt.plot_points(ring_topology_network.nodes, True, 'full_ring_points')
     plt.plot_network_grapth(ring_topology_network, 'full_ring')
 
-    ring_topology_network.remove_node(11)
-    ring_topology_network.ospf('ring_remove')
+    ring_spf.remove_node(11)
+    ring_topology_network.ospf('ring_remove', ring_spf.trees, OutputFormat.kText)
     plt.plot_network_grapth(ring_topology_network, 'rm_ring')
 
     star_topology_nerwork = Network.create_network(Topology.kStar)
     plt.plot_points(star_topology_nerwork.nodes, True, 'full_star_points')
     plt.plot_network_grapth(star_topology_nerwork, 'full_star')
-    star_topology_nerwork.ospf('star_full')
+    star_spf = IncrementalSpf(star_topology_nerwork)
+    star_topology_nerwork.ospf('star_full', star_spf.trees, OutputFormat.kText)
 
-    star_topology_nerwork.remove_node(0)
+    star_spf.remove_node(0)
     plt.plot_network_grapth(star_topology_nerwork, 'rm_star')
-    star_topology_nerwork.ospf('star_remove')
+    star_topology_nerwork.ospf('star_remove', star_spf.trees, OutputFormat.kText)
 
 
 if __name__ == '__main__':
@@ -1,16 +1,60 @@
 from __future__ import annotations
 from enum import Enum
-from typing import List
+from typing import Iterator, List, NamedTuple, Sequence, Tuple
+from collections import OrderedDict
+from array import array
 from math import inf
+from tables import RoutingTableWriter
+import numpy as np
+import heapq
 
 
 class Topology(Enum):
     kLine = 0,
     kRing = 1,
-    kStar = 2
+    kStar = 2,
+    kGrid = 3,
+    kRandomGeometric = 4,
+    kWaxman = 5,
+    kScaleFree = 6
+
+    @staticmethod
+    def to_str(topology: Topology) -> str:
+        if topology == Topology.kLine:
+            return 'line'
+        elif topology == Topology.kRing:
+            return 'ring'
+        elif topology == Topology.kStar:
+            return 'star'
+        elif topology == Topology.kGrid:
+            return 'grid'
+        elif topology == Topology.kRandomGeometric:
+            return 'random-geometric'
+        elif topology == Topology.kWaxman:
+            return 'waxman'
+        elif topology == Topology.kScaleFree:
+            return 'scale-free'
+
+        return ''
+
+
+class OutputFormat(Enum):
+    kBinary = 0,
+    kText = 1
+
+    @staticmethod
+    def to_str(output_format: OutputFormat) -> str:
+        if output_format == OutputFormat.kBinary:
+            return 'binary'
+        elif output_format == OutputFormat.kText:
+            return 'text'
+
+        return ''
 
 
 class Point:
+    __slots__ = ('x', 'y')
+
     def __init__(self, x: float, y: float) -> None:
         self.x = x
         self.y = y
@@ -19,6 +63,64 @@ class Point:
         return ((self.x - other.x) ** 2 + (self.y - other.y) ** 2) ** 0.5
     
 
+class ShortestPathTree:
+    def __init__(self, start_node: int, distances: List[float], predecessors: List[int]) -> None:
+        self.start_node = start_node
+        self.distances = distances
+        # -1 for the start node and for unreachable nodes
+        self.predecessors = predecessors
+
+    def path(self, node_idx: int) -> List[int]:
+        if self.distances[node_idx] == inf:
+            return []
+
+        path = []
+        while node_idx != -1:
+            path.append(node_idx)
+            node_idx = self.predecessors[node_idx]
+
+        path.reverse()
+        return path
+
+    def paths(self) -> List[List[int]]:
+        return [self.path(i) for i in range(len(self.distances))]
+
+    # a copy with array backed distances and predecessors, 12 bytes per node
+    def compact(self) -> ShortestPathTree:
+        return ShortestPathTree(self.start_node, array('d', self.distances), array('i', self.predecessors))
+
+    def get_size(self) -> int:
+        return len(self.distances) * 8 + len(self.predecessors) * 4
+
+    # first node after the start node on the path to every node, the start node for itself, -1 for unreachable nodes.
+    # settled lists the reachable nodes in the order dijkstra settled them, every node after its predecessor, when
+    # given the hops are handed down in one pass
+    def next_hops(self, settled: Sequence[int] = None) -> List[int]:
+        hops = [-1 for _ in range(len(self.predecessors))]
+        hops[self.start_node] = self.start_node
+
+        if settled is not None:
+            for node_idx in settled:
+                predecessor = self.predecessors[node_idx]
+                if predecessor != -1:
+                    hops[node_idx] = node_idx if predecessor == self.start_node else hops[predecessor]
+            return hops
+
+        for node_idx in range(len(hops)):
+            # climb to the first node with a known hop, then hand it down the climbed chain
+            chain = []
+            while hops[node_idx] == -1 and self.predecessors[node_idx] != -1:
+                chain.append(node_idx)
+                node_idx = self.predecessors[node_idx]
+
+            hop = hops[node_idx]
+            for chain_idx in reversed(chain):
+                hop = chain_idx if self.predecessors[chain_idx] == self.start_node else hop
+                hops[chain_idx] = hop
+
+        return hops
+
+
 def print_paths(start_node: int, paths: List[List[int]], file = None) -> None:
     for i, path in enumerate(paths):
         if len(path) > 0:
@@ -30,85 +132,382 @@ def print_paths(start_node: int, paths: List[List[int]], file = None) -> None:
             file.write(f'path {start_node} -> {i}: {path}\n')
     
 
+# All pairs closer than radius, found through a uniform grid of radius sized cells: only the 3x3 cells
+# around a point can hold its neighbours. Non finite (removed) points get no pairs, every point pairs with itself.
+# Yields (sources, targets, lengths) arrays, chunk_size points at a time keeps the candidate arrays bounded.
+# Unordered pairs come once and without the point itself, only half of the neighbour cells are searched then.
+def close_pairs(xs: np.ndarray, ys: np.ndarray, radius: float, chunk_size: int = None, unordered: bool = False):
+    alive = np.flatnonzero(np.isfinite(xs) & np.isfinite(ys))
+    if radius <= 0.0 or len(alive) == 0:
+        return
+
+    cell_x = np.floor((xs[alive] - xs[alive].min()) / radius).astype(np.int64)
+    cell_y = np.floor((ys[alive] - ys[alive].min()) / radius).astype(np.int64)
+    # one spare row keeps the keys of the cells around the grid apart from the real ones
+    rows_num = int(cell_y.max()) + 2
+    keys = cell_x * rows_num + cell_y
+
+    # work in cell order: neighbour cell lookups become sorted queries and candidates lie close in memory
+    order = np.argsort(keys, kind='stable')
+    sorted_keys = keys[order]
+    sorted_xs = xs[alive][order]
+    sorted_ys = ys[alive][order]
+
+    chunk_size = len(alive) if chunk_size is None else chunk_size
+    offsets = [(dx, dy) for dx in (-1, 0, 1) for dy in (-1, 0, 1) if not unordered or (dx, dy) >= (0, 0)]
+    for chunk_begin in range(0, len(alive), chunk_size):
+        chunk_keys = sorted_keys[chunk_begin:chunk_begin + chunk_size]
+        sources = []
+        targets = []
+        for dx, dy in offsets:
+            neightbour_keys = chunk_keys + (dx * rows_num + dy)
+            begins = np.searchsorted(sorted_keys, neightbour_keys, 'left')
+            counts = np.searchsorted(sorted_keys, neightbour_keys, 'right') - begins
+
+            # every point paired with every point of the neighbour cell
+            pair_sources = np.repeat(np.arange(chunk_begin, chunk_begin + len(chunk_keys)), counts)
+            pair_offsets = np.arange(len(pair_sources)) - np.repeat(np.cumsum(counts) - counts, counts)
+            pair_targets = np.repeat(begins, counts) + pair_offsets
+            if unordered and (dx, dy) == (0, 0):
+                forward = pair_sources < pair_targets
+                pair_sources, pair_targets = pair_sources[forward], pair_targets[forward]
+
+            sources.append(pair_sources)
+            targets.append(pair_targets)
+
+        sources = np.concatenate(sources)
+        targets = np.concatenate(targets)
+        lengths = np.sqrt((sorted_xs[sources] - sorted_xs[targets]) ** 2 + (sorted_ys[sources] - sorted_ys[targets]) ** 2)
+
+        close = lengths < radius
+        yield alive[order[sources[close]]], alive[order[targets[close]]], lengths[close]
+
+
+# csr arrays of a directed edge list: the edges of node i are indices[indptr[i]:indptr[i + 1]], sorted by
+# neighbour, with the matching weights
+def csr_arrays(nodes_num: int, sources: np.ndarray, targets: np.ndarray,
+               weights: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    edge_order = np.argsort(sources * nodes_num + targets, kind='stable')
+    indptr = np.zeros(nodes_num + 1, dtype=np.int64)
+    np.cumsum(np.bincount(sources, minlength=nodes_num), out=indptr[1:])
+    return indptr, targets[edge_order].astype(np.int32), weights[edge_order].astype(np.float64)
+
+
+# Dijkstra over csr lists (as Network.csr_lists gives them): the heap loop reads single elements, python lists are
+# several times faster there than numpy arrays. The settled nodes are appended to settled in order, if it is given.
+def csr_dijkstra(indptr: Sequence[int], indices: Sequence[int], weights: Sequence[float], start_node_idx: int,
+                 settled: List[int] = None) -> ShortestPathTree:
+    nodes_num = len(indptr) - 1
+    distances = [inf for _ in range(nodes_num)]
+    distances[start_node_idx] = 0.0
+    predecessors = [-1 for _ in range(nodes_num)]
+
+    # (distance, push counter, vertex): among equal distances the earliest pushed vertex is settled first
+    vertex_heap = [(0.0, 0, start_node_idx)]
+    push_counter = 1
+
+    while len(vertex_heap) > 0:
+        cur_dist, _, cur_idx = heapq.heappop(vertex_heap)
+        if cur_dist > distances[cur_idx]:
+            # pushed again at a shorter distance since, and settled then
+            continue
+
+        if settled is not None:
+            settled.append(cur_idx)
+
+        begin, end = indptr[cur_idx], indptr[cur_idx + 1]
+        for neightbour, weight in zip(indices[begin:end], weights[begin:end]):
+            new_dist = cur_dist + weight
+            if new_dist < distances[neightbour]:
+                distances[neightbour] = new_dist
+                predecessors[neightbour] = cur_idx
+                heapq.heappush(vertex_heap, (new_dist, push_counter, neightbour))
+                push_counter += 1
+
+    return ShortestPathTree(start_node_idx, distances, predecessors)
+
+
+def radius_graph(xs: np.ndarray, ys: np.ndarray, radius: float) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    pairs = list(close_pairs(xs, ys, radius))
+    if len(pairs) == 0:
+        return np.zeros(len(xs) + 1, dtype=np.int64), np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.float64)
+
+    return csr_arrays(len(xs), *pairs[0])
+
+
+kTreeCacheBytes = 64 * 2 ** 20
+
+
+class TreeCacheStats(NamedTuple):
+    hits: int
+    misses: int
+    # trees dropped because the topology changed after they were computed
+    invalidations: int
+    # trees dropped to stay within max_bytes
+    evictions: int
+    trees: int
+    bytes: int
+    max_bytes: int
+
+    def hit_rate(self) -> float:
+        queries = self.hits + self.misses
+        return self.hits / queries if queries > 0 else 0.0
+
+
+# Least recently used shortest path trees by source, within max_bytes of compact trees. The cache holds trees
+# of a single topology version, the first query after the network moves on to another version drops them all.
+class TreeCache:
+    def __init__(self, max_bytes: int = kTreeCacheBytes) -> None:
+        self.max_bytes = max_bytes
+        self.trees: OrderedDict[int, ShortestPathTree] = OrderedDict()
+        self.topology_version: int = None
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.evictions = 0
+
+    def get(self, network: Network, source: int) -> ShortestPathTree:
+        if self.topology_version != network.topology_version:
+            # a topology change outdates every tree at once
+            self.invalidations += len(self.trees)
+            self.clear()
+            self.topology_version = network.topology_version
+
+        tree = self.trees.get(source)
+        if tree is not None:
+            self.trees.move_to_end(source)
+            self.hits += 1
+            return tree
+
+        self.misses += 1
+        tree = network.network_dijkstra(source).compact()
+        if tree.get_size() > self.max_bytes:
+            return tree
+
+        while self.bytes + tree.get_size() > self.max_bytes:
+            _, evicted = self.trees.popitem(last=False)
+            self.bytes -= evicted.get_size()
+            self.evictions += 1
+
+        self.trees[source] = tree
+        self.bytes += tree.get_size()
+        return tree
+
+    def clear(self) -> None:
+        self.trees.clear()
+        self.bytes = 0
+
+    def stats(self) -> TreeCacheStats:
+        return TreeCacheStats(self.hits, self.misses, self.invalidations, self.evictions, len(self.trees), self.bytes, self.max_bytes)
+
+
+# Point access to the coordinate arrays of a network, removed nodes read as Point(inf, inf)
+class PointsView:
+    def __init__(self, network: Network) -> None:
+        self.network = network
+
+    def __len__(self) -> int:
+        return len(self.network.xs)
+
+    def __getitem__(self, node_idx: int) -> Point:
+        if not self.network.alive[node_idx]:
+            return Point(inf, inf)
+        return Point(float(self.network.xs[node_idx]), float(self.network.ys[node_idx]))
+
+    def __iter__(self) -> Iterator[Point]:
+        return (self[i] for i in range(len(self)))
+
+
+# edges of removed nodes, as a share of all edges, that trigger a compaction
+kCompactionRatio = 0.25
+
+
+# Nodes are coordinate arrays with an alive mask, links are csr arrays (indptr, indices, weights) built on demand.
+# A removed node keeps its index, its edges become infinitely long tombstones until a compaction drops them.
 class Network:
+    # the fixed star of main.py only, generators.create_topology builds every topology at any size
     @staticmethod
     def create_network(topology: Topology) -> Network:
-        network = None
-
-        if topology == Topology.kStar:
-            nodes = [
-                Point(0.0, 0.0),
-                Point(1.0, 0.0), Point(0.0, 1.0), Point(-1.0, 0.0), Point(0.0, -1.0),
-                Point(1.0, 1.0), Point(1.0, -1.0), Point(-1.0, 1.0), Point(-1.0, -1.0)
-                ]
-            network = Network(nodes=nodes, connection_radius=0.0)
-            network.nodes_graph = [[0] for i, n in enumerate(nodes) if i > 0]
-            network.nodes_graph = [[i for i, n in enumerate(nodes) if i > 0]] + network.nodes_graph
+        assert topology == Topology.kStar, f'{Topology.to_str(topology)} networks are built by generators.create_topology'
+        nodes = [
+            Point(0.0, 0.0),
+            Point(1.0, 0.0), Point(0.0, 1.0), Point(-1.0, 0.0), Point(0.0, -1.0),
+            Point(1.0, 1.0), Point(1.0, -1.0), Point(-1.0, 1.0), Point(-1.0, -1.0)
+            ]
+        network = Network(nodes=nodes, connection_radius=0.0)
+        leaves = np.arange(1, len(nodes))
+        network.set_edges(np.concatenate((np.zeros_like(leaves), leaves)), np.concatenate((leaves, np.zeros_like(leaves))))
 
         return network
 
-    def __init__(self, nodes: List[Point], connection_radius: float) -> None:
-        self.nodes = nodes
+    @staticmethod
+    def from_arrays(xs: np.ndarray, ys: np.ndarray, connection_radius: float) -> Network:
+        network = Network([], connection_radius)
+        network.xs = np.array(xs, dtype=np.float64)
+        network.ys = np.array(ys, dtype=np.float64)
+        network.alive = np.isfinite(network.xs) & np.isfinite(network.ys)
+        return network
+
+    def __init__(self, nodes: Sequence[Point], connection_radius: float) -> None:
+        self.xs = np.array([node.x for node in nodes], dtype=np.float64)
+        self.ys = np.array([node.y for node in nodes], dtype=np.float64)
+        self.alive = np.isfinite(self.xs) & np.isfinite(self.ys)
         self.radius = connection_radius
-        self.nodes_graph: List[List[int]] = None
+        self.indptr: np.ndarray = None
+        self.indices: np.ndarray = None
+        self.weights: np.ndarray = None
+        self.tombstones = 0
+        # bumped by every change of nodes, links or weights, cached trees of older versions are outdated
+        self.topology_version = 0
+        self.tree_cache = TreeCache()
+        # the csr arrays as python lists for the heap loops, rebuilt after topology changes
+        self.lists: Tuple[List[int], List[int], List[float]] = None
+        self.lists_version = -1
+
+    @property
+    def nodes(self) -> PointsView:
+        return PointsView(self)
+
+    def is_built(self) -> bool:
+        return self.indptr is not None
+
+    def csr_lists(self) -> Tuple[List[int], List[int], List[float]]:
+        if self.lists_version != self.topology_version:
+            self.lists = (self.indptr.tolist(), self.indices.tolist(), self.weights.tolist())
+            self.lists_version = self.topology_version
+        return self.lists
+
+    # live neighbours, the node itself included in radius graphs
+    def neightbours(self, node_idx: int) -> List[int]:
+        if not self.alive[node_idx]:
+            return []
+
+        targets = self.indices[self.indptr[node_idx]:self.indptr[node_idx + 1]]
+        return targets[self.alive[targets]].tolist()
+
+    def degrees(self) -> np.ndarray:
+        return np.diff(self.indptr)
+
+    # links between the given nodes, both directions must be listed; weights default to the link lengths
+    def set_edges(self, sources: np.ndarray, targets: np.ndarray, weights: np.ndarray = None) -> None:
+        if weights is None:
+            weights = np.sqrt((self.xs[sources] - self.xs[targets]) ** 2 + (self.ys[sources] - self.ys[targets]) ** 2)
+        self.indptr, self.indices, self.weights = csr_arrays(len(self.xs), sources, targets, weights)
+        self.tombstones = 0
+        self.topology_version += 1
+
+    def path(self, start_node_idx: int, node_idx: int) -> List[int]:
+        return self.tree_cache.get(self, start_node_idx).path(node_idx)
+
+    def distance(self, start_node_idx: int, node_idx: int) -> float:
+        return self.tree_cache.get(self, start_node_idx).distances[node_idx]
+
+    def edge_position(self, first_idx: int, second_idx: int) -> int:
+        begin, end = self.indptr[first_idx], self.indptr[first_idx + 1]
+        k = begin + int(np.searchsorted(self.indices[begin:end], second_idx))
+        assert k < end and self.indices[k] == second_idx, f'no link {first_idx} -> {second_idx}'
+        return k
 
     def remove_node(self, node_idx) -> None:
-        self.nodes[node_idx] = Point(inf, inf)
-        if self.nodes_graph is not None:
-            self.build_graph()
+        self.alive[node_idx] = False
+        self.topology_version += 1
+        if not self.is_built():
+            return
+
+        # the removed node keeps its edges, but they become infinitely long
+        begin, end = self.indptr[node_idx], self.indptr[node_idx + 1]
+        for neightbour in self.indices[begin:end].tolist():
+            if neightbour != node_idx and self.weights[self.edge_position(neightbour, node_idx)] < inf:
+                self.weights[self.edge_position(neightbour, node_idx)] = inf
+                self.tombstones += 1
+        self.tombstones += int(np.count_nonzero(self.weights[begin:end] < inf))
+        self.weights[begin:end] = inf
+
+        if self.tombstones > kCompactionRatio * len(self.indices):
+            self.compact()
+
+    # drops the edges of removed nodes, node indices stay as they are
+    def compact(self) -> None:
+        sources = np.repeat(np.arange(len(self.xs)), self.degrees())
+        live = self.alive[sources] & self.alive[self.indices]
+        self.indptr = np.zeros(len(self.xs) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(sources[live], minlength=len(self.xs)), out=self.indptr[1:])
+        self.indices = self.indices[live]
+        self.weights = self.weights[live]
+        self.tombstones = 0
+        self.topology_version += 1
+
+    # connects a new node to every node within the radius, edge lists stay sorted
+    def add_node(self, node: Point) -> int:
+        node_idx = len(self.xs)
+        self.xs = np.append(self.xs, node.x)
+        self.ys = np.append(self.ys, node.y)
+        self.alive = np.append(self.alive, np.isfinite(node.x) and np.isfinite(node.y))
+        self.topology_version += 1
+        if not self.is_built():
+            return node_idx
+
+        lengths = np.sqrt((self.xs - node.x) ** 2 + (self.ys - node.y) ** 2)
+        neightbours = np.flatnonzero(self.alive & (lengths < self.radius))
+        others = neightbours[neightbours != node_idx]
+
+        # the new node has the largest index, it goes last in every neightbour's edges
+        self.indices = np.insert(self.indices, self.indptr[others + 1], node_idx)
+        self.weights = np.insert(self.weights, self.indptr[others + 1], lengths[others])
+        shifts = np.zeros(len(self.indptr), dtype=np.int64)
+        np.add.at(shifts, others + 1, 1)
+        self.indptr = np.cumsum(shifts) + self.indptr
+
+        self.indices = np.concatenate((self.indices, neightbours.astype(np.int32)))
+        self.weights = np.concatenate((self.weights, lengths[neightbours]))
+        self.indptr = np.append(self.indptr, len(self.indices))
+        return node_idx
+
+    # sets the cost of the existing link between two nodes in both directions, links of removed nodes stay removed
+    def set_link_cost(self, first_idx: int, second_idx: int, weight: float) -> None:
+        assert self.alive[first_idx] and self.alive[second_idx], f'link {first_idx} - {second_idx} of a removed node'
+        assert weight < inf, 'links are removed with their nodes'
+        first_position = self.edge_position(first_idx, second_idx)
+        second_position = self.edge_position(second_idx, first_idx)
+        assert self.weights[first_position] < inf, f'link {first_idx} - {second_idx} is removed'
+
+        self.topology_version += 1
+        self.weights[first_position] = weight
+        self.weights[second_position] = weight
+
+    def get_link_cost(self, first_idx: int, second_idx: int) -> float:
+        return float(self.weights[self.edge_position(first_idx, second_idx)])
 
     def build_graph(self) -> None:
-        if self.nodes_graph is not None:
+        if self.is_built():
+            return
+
+        # removed nodes get no edges
+        xs = np.where(self.alive, self.xs, inf)
+        self.indptr, self.indices, self.weights = radius_graph(xs, self.ys, self.radius)
+        self.tombstones = 0
+        self.topology_version += 1
+
+    # trees of every source node, when they are maintained elsewhere (spf.IncrementalSpf)
+    # the binary format keeps next hop and distance tables (tables.RoutingTable), the text one lists every full path
+    def ospf(self, title: str, trees: List[ShortestPathTree] = None, output_format: OutputFormat = OutputFormat.kBinary) -> None:
+        if output_format == OutputFormat.kBinary:
+            with RoutingTableWriter(f'results/{title}.rtbl', len(self.xs)) as writer:
+                for i in range(len(self.xs)):
+                    tree = self.network_dijkstra(i) if trees is None else trees[i]
+                    writer.write(tree.next_hops(), tree.distances)
             return
-        
-        self.nodes_graph = [[i for i, n in enumerate(self.nodes) if node.dist(n) < self.radius] for node in self.nodes]
 
-    def ospf(self, title: str) -> None:
         with open(f'results/{title}.txt', 'w') as f:
-            for i in range(len(self.nodes)):
+            for i in range(len(self.xs)):
                 f.write(f'Start node {i}:\n')
-                paths = self.network_dijkstra(i)
+                paths = self.network_dijkstra(i).paths() if trees is None else trees[i].paths()
                 print_paths(i, paths, f)
                 f.write(f'###################################\n')
 
-    def network_dijkstra(self, start_node_idx: int) -> List[List[int]]:
-        assert 0 <= start_node_idx < len(self.nodes)
-        
-        distances = [inf for _ in range(len(self.nodes))]
-        distances[start_node_idx] = 0
-        used = [False for _ in range(len(self.nodes))]
-        paths = [[] for _ in range(len(self.nodes))]
-
-        class Node:
-            def __init__(self, idx: int, dist: float) -> None:
-                self.vert_idx = idx
-                self.dist = dist
-
-        vertex_heap = [Node(start_node_idx, distances[start_node_idx])]
-
-        while len(vertex_heap) > 0:
-            cur_min_node = Node(-1, inf)
-            cur_min_idx = -1
-            for i, node in enumerate(vertex_heap):
-                if node.dist < cur_min_node.dist:
-                    cur_min_node = node
-                    cur_min_idx= i
-
-            del vertex_heap[cur_min_idx]
-            if used[cur_min_node.vert_idx]:
-                continue
-            
-            used[cur_min_node.vert_idx] = True
-
-            for neightbour in self.nodes_graph[cur_min_node.vert_idx]:
-                new_dist = distances[cur_min_node.vert_idx] + self.nodes[neightbour].dist(self.nodes[cur_min_node.vert_idx])
-                if new_dist < distances[neightbour]:
-                    distances[neightbour] = new_dist
-                    vertex_heap.append(Node(neightbour, new_dist))
-                    paths[neightbour] = paths[cur_min_node.vert_idx] + [cur_min_node.vert_idx]
-
-        for i, path in enumerate(paths):
-            if distances[i] < inf:
-                path.append(i)
-
-        return paths
+    def network_dijkstra(self, start_node_idx: int) -> ShortestPathTree:
+        nodes_num = len(self.xs)
+        assert 0 <= start_node_idx < nodes_num
+        self.build_graph()
+        return csr_dijkstra(*self.csr_lists(), start_node_idx)
@@ -24,10 +24,10 @@ class Plotter:
             plt.clf()
 
     def plot_network_grapth(self, network: Network, title: str = '') -> None:
-        for i, neightbours in enumerate(network.nodes_graph):
+        for i in range(len(network.nodes)):
             cur_point = network.nodes[i]
 
-            for node_idx in neightbours:
+            for node_idx in network.neightbours(i):
                 neightbour_point = network.nodes[node_idx]
                 plt.plot((cur_point.x, neightbour_point.x), (cur_point.y, neightbour_point.y), 'r')
 
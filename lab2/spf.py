@@ -0,0 +1,163 @@
+from __future__ import annotations
+from typing import List, Tuple
+from math import inf
+from network import Network, Point, ShortestPathTree
+import heapq
+
+
+# Shortest path trees of every source node, kept up to date across topology changes.
+# A failure or a more expensive link only invalidates the subtrees hanging below the changed
+# node or link, and only those nodes are settled again. A new node or a cheaper link can only
+# shorten paths, the improvement is propagated from the changed place outwards.
+# Network links are symmetric, so the edges into a node are read from its own csr row.
+class IncrementalSpf:
+    def __init__(self, network: Network) -> None:
+        network.build_graph()
+        self.network = network
+        self.trees = [network.network_dijkstra(i) for i in range(len(network.xs))]
+        self.children = [IncrementalSpf.make_children(tree) for tree in self.trees]
+        # nodes settled again by the updates, a full recompute settles every reachable node of every tree
+        self.touched_nodes = 0
+
+    @staticmethod
+    def make_children(tree: ShortestPathTree) -> List[List[int]]:
+        children = [[] for _ in range(len(tree.predecessors))]
+        for node_idx, predecessor in enumerate(tree.predecessors):
+            if predecessor != -1:
+                children[predecessor].append(node_idx)
+
+        return children
+
+    def remove_node(self, node_idx: int) -> None:
+        self.network.remove_node(node_idx)
+
+        for tree, children in zip(self.trees, self.children):
+            if tree.start_node == node_idx:
+                # every path of a removed source is gone, only the source itself stays
+                for child in list(children[node_idx]):
+                    self.repair(tree, children, self.invalidate(tree, children, child))
+            elif tree.distances[node_idx] < inf:
+                self.repair(tree, children, self.invalidate(tree, children, node_idx))
+
+    def add_node(self, node: Point) -> int:
+        node_idx = self.network.add_node(node)
+        indptr, indices, weights = self.network.csr_lists()
+        in_edges = [(indices[k], weights[k]) for k in range(indptr[node_idx], indptr[node_idx + 1])]
+
+        for tree, children in zip(self.trees, self.children):
+            tree.distances.append(inf)
+            tree.predecessors.append(-1)
+            children.append([])
+            self.improve(tree, children, [(u, node_idx, weight) for u, weight in in_edges])
+
+        self.trees.append(self.network.network_dijkstra(node_idx))
+        self.children.append(IncrementalSpf.make_children(self.trees[-1]))
+        self.touched_nodes += sum(1 for distance in self.trees[-1].distances if distance < inf)
+        return node_idx
+
+    def set_link_cost(self, first_idx: int, second_idx: int, weight: float) -> None:
+        old_weight = self.network.get_link_cost(first_idx, second_idx)
+        self.network.set_link_cost(first_idx, second_idx, weight)
+
+        for tree, children in zip(self.trees, self.children):
+            if weight < old_weight:
+                self.improve(tree, children, [(first_idx, second_idx, weight), (second_idx, first_idx, weight)])
+            elif weight > old_weight:
+                # only paths that used the link get longer
+                for u, v in [(first_idx, second_idx), (second_idx, first_idx)]:
+                    if tree.predecessors[v] == u:
+                        self.repair(tree, children, self.invalidate(tree, children, v))
+
+    # detaches the subtree of root, its nodes become unreachable until repair
+    def invalidate(self, tree: ShortestPathTree, children: List[List[int]], root: int) -> List[int]:
+        if tree.predecessors[root] != -1:
+            children[tree.predecessors[root]].remove(root)
+
+        affected = [root]
+        i = 0
+        while i < len(affected):
+            node_idx = affected[i]
+            affected.extend(children[node_idx])
+            children[node_idx] = []
+            tree.distances[node_idx] = inf
+            tree.predecessors[node_idx] = -1
+            i += 1
+
+        return affected
+
+    # settles the detached nodes again, starting from their best edges into the intact part of the tree
+    def repair(self, tree: ShortestPathTree, children: List[List[int]], affected: List[int]) -> None:
+        distances = tree.distances
+        predecessors = tree.predecessors
+        indptr, indices, weights = self.network.csr_lists()
+
+        vertex_heap = []
+        push_counter = 0
+        for v in affected:
+            for k in range(indptr[v], indptr[v + 1]):
+                u = indices[k]
+                new_dist = distances[u] + weights[k]
+                if new_dist < distances[v]:
+                    distances[v] = new_dist
+                    predecessors[v] = u
+            if distances[v] < inf:
+                heapq.heappush(vertex_heap, (distances[v], push_counter, v))
+                push_counter += 1
+
+        used = set()
+        while len(vertex_heap) > 0:
+            cur_dist, _, cur_idx = heapq.heappop(vertex_heap)
+            if cur_idx in used or cur_dist > distances[cur_idx]:
+                continue
+
+            used.add(cur_idx)
+            for k in range(indptr[cur_idx], indptr[cur_idx + 1]):
+                neightbour = indices[k]
+                new_dist = cur_dist + weights[k]
+                # nodes outside the detached part already have their shortest distance
+                if new_dist < distances[neightbour]:
+                    distances[neightbour] = new_dist
+                    predecessors[neightbour] = cur_idx
+                    heapq.heappush(vertex_heap, (new_dist, push_counter, neightbour))
+                    push_counter += 1
+
+        for v in affected:
+            if predecessors[v] != -1:
+                children[predecessors[v]].append(v)
+
+        self.touched_nodes += len(used)
+
+    # propagates shorter paths through the given (u, v, weight) edges
+    def improve(self, tree: ShortestPathTree, children: List[List[int]], edges: List[Tuple[int, int, float]]) -> None:
+        distances = tree.distances
+        indptr, indices, weights = self.network.csr_lists()
+
+        vertex_heap = []
+        push_counter = 0
+        for u, v, weight in edges:
+            if distances[u] + weight < distances[v]:
+                self.set_predecessor(tree, children, v, u, distances[u] + weight)
+                heapq.heappush(vertex_heap, (distances[v], push_counter, v))
+                push_counter += 1
+
+        while len(vertex_heap) > 0:
+            cur_dist, _, cur_idx = heapq.heappop(vertex_heap)
+            if cur_dist > distances[cur_idx]:
+                continue
+
+            self.touched_nodes += 1
+            for k in range(indptr[cur_idx], indptr[cur_idx + 1]):
+                neightbour = indices[k]
+                new_dist = cur_dist + weights[k]
+                if new_dist < distances[neightbour]:
+                    self.set_predecessor(tree, children, neightbour, cur_idx, new_dist)
+                    heapq.heappush(vertex_heap, (new_dist, push_counter, neightbour))
+                    push_counter += 1
+
+    def set_predecessor(self, tree: ShortestPathTree, children: List[List[int]], node_idx: int, predecessor: int, distance: float) -> None:
+        if tree.predecessors[node_idx] != -1:
+            children[tree.predecessors[node_idx]].remove(node_idx)
+
+        tree.distances[node_idx] = distance
+        tree.predecessors[node_idx] = predecessor
+        children[predecessor].append(node_idx)
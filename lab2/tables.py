@@ -0,0 +1,73 @@
+from __future__ import annotations
+from typing import List
+import numpy as np
+import struct
+
+
+# Routing table file: a 16 byte header (magic, nodes number) and one fixed width record per router, in router
+# order. A record holds the next hop (int32, -1 for unreachable nodes) and the distance (float64) to every node.
+# The file is mapped into memory on load, so only the records a query touches are read from disk.
+kMagic = b'RTBL'
+kVersion = 1
+kHeader = struct.Struct('<4sHHq')
+
+
+def record_dtype(nodes_num: int) -> np.dtype:
+    return np.dtype([('next_hops', '<i4', (nodes_num,)), ('distances', '<f8', (nodes_num,))])
+
+
+# Appends router records one by one, nothing but the current record is kept in memory.
+class RoutingTableWriter:
+    def __init__(self, path: str, nodes_num: int) -> None:
+        self.nodes_num = nodes_num
+        self.record = np.zeros(1, dtype=record_dtype(nodes_num))
+        self.records_num = 0
+        self.file = open(path, 'wb')
+        self.file.write(kHeader.pack(kMagic, kVersion, 0, nodes_num))
+
+    def write(self, next_hops, distances) -> None:
+        assert self.records_num < self.nodes_num
+        self.record['next_hops'][0] = next_hops
+        self.record['distances'][0] = distances
+        self.file.write(self.record.tobytes())
+        self.records_num += 1
+
+    def close(self) -> None:
+        self.file.close()
+
+    def __enter__(self) -> RoutingTableWriter:
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+
+class RoutingTable:
+    def __init__(self, path: str) -> None:
+        with open(path, 'rb') as file:
+            magic, version, _, nodes_num = kHeader.unpack(file.read(kHeader.size))
+        assert magic == kMagic, f'{path} is not a routing table file'
+        assert version == kVersion, f'{path}: unsupported routing table version {version}'
+
+        self.nodes_num = nodes_num
+        self.records = np.memmap(path, dtype=record_dtype(nodes_num), mode='r', offset=kHeader.size)
+
+    def routers_num(self) -> int:
+        return len(self.records)
+
+    def next_hop(self, source: int, destination: int) -> int:
+        return int(self.records[source]['next_hops'][destination])
+
+    def distance(self, source: int, destination: int) -> float:
+        return float(self.records[source]['distances'][destination])
+
+    # hop by hop, the way packets travel: every router on the way forwards by its own table
+    def path(self, source: int, destination: int) -> List[int]:
+        path = [source]
+        while path[-1] != destination:
+            hop = self.next_hop(path[-1], destination)
+            if hop == -1 or len(path) > self.nodes_num:
+                return []
+            path.append(hop)
+
+        return path